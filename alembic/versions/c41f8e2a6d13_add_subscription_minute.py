@@ -0,0 +1,40 @@
+"""Add indexed minute-of-day column to subscriptions
+
+Revision ID: c41f8e2a6d13
+Revises: b7e1c2d4a9f0
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f8e2a6d13'
+down_revision: Union[str, None] = 'b7e1c2d4a9f0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('minute', sa.Integer(), nullable=True))
+
+    op.execute("""
+        UPDATE subscriptions
+        SET minute = CAST(substr(time, 1, 2) AS INTEGER) * 60 + CAST(substr(time, 4, 2) AS INTEGER)
+    """)
+
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.alter_column('minute', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_index('ix_subscriptions_minute', ['minute'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('subscriptions', schema=None) as batch_op:
+        batch_op.drop_index('ix_subscriptions_minute')
+        batch_op.drop_column('minute')
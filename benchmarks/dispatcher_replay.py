@@ -0,0 +1,284 @@
+"""
+Replay Telegram updates through the bot's Dispatcher (core.bot.create_dispatcher)
+and measure where the time goes, without polling or the real APIs.
+
+Updates are fed straight into Dispatcher.feed_raw_update. OpenWeather is served
+by FakeOpenWeather from benchmarks/fake_servers.py; Bot API calls made by the
+handlers are answered in-process by a recording session, optionally after
+--send-latency. Subscription updates write to a scratch SQLite database.
+
+The trace is either synthetic (/weather, /forecast, /hourly, /air and the full
+subscribe flow across --chats chats) or a JSON-lines file of Update objects as
+returned by getUpdates. Each trace is replayed twice: sequentially, one update
+at a time, and with all chats concurrent, each chat's updates in order. The
+tool reports per-handler latency percentiles and total updates per second.
+
+    python -m benchmarks.dispatcher_replay --updates 5000 --chats 100 --cities 50
+    python -m benchmarks.dispatcher_replay --save-trace trace.jsonl
+    python -m benchmarks.dispatcher_replay --trace trace.jsonl --export-traces spans.jsonl
+"""
+import argparse
+import asyncio
+import datetime
+import importlib
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+from collections import defaultdict
+
+from benchmarks.fake_servers import FakeOpenWeather
+from benchmarks.scheduler_load import percentiles
+
+SUBSCRIBE_TYPES = ("weather", "hourly", "air", "details", "sun", "wind")
+
+
+def _user(chat_id: int) -> dict:
+    return {"id": chat_id, "is_bot": False, "first_name": "Replay"}
+
+
+def _message(update_id: int, chat_id: int, text: str) -> dict:
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": _user(chat_id),
+            "text": text,
+        },
+    }
+
+
+def _callback(update_id: int, chat_id: int, data: str) -> dict:
+    return {
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": _user(chat_id),
+            "chat_instance": str(chat_id),
+            "data": data,
+            "message": {
+                "message_id": update_id,
+                "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"},
+                "text": "Choose a subscription type",
+            },
+        },
+    }
+
+
+def synthetic_trace(updates: int, chats: int, cities: int, seed: int = 0) -> list:
+    """Build `updates` raw updates spread over `chats` chats: weather commands and subscribe flows."""
+    from handlers.keyboards import SUBSCRIBE_BTN, MY_SUBSCRIBE_BTN
+
+    rnd = random.Random(seed)
+    names = [f"city{i:05d}" for i in range(cities)]
+    trace = []
+    update_id = 1
+    while len(trace) < updates:
+        chat_id = 20_000_000 + rnd.randrange(chats)
+        city = rnd.choice(names)
+        roll = rnd.random()
+        if roll < 0.3:
+            texts = [f"/weather {city}"]
+        elif roll < 0.5:
+            texts = [f"/forecast {city} {rnd.randint(1, 5)}"]
+        elif roll < 0.65:
+            texts = [f"/hourly {city}"]
+        elif roll < 0.8:
+            texts = [f"/air {city}"]
+        else:
+            trace.append(_message(update_id, chat_id, SUBSCRIBE_BTN))
+            trace.append(_callback(update_id + 1, chat_id, f"sub_type_{rnd.choice(SUBSCRIBE_TYPES)}"))
+            update_id += 2
+            texts = [f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}", city, MY_SUBSCRIBE_BTN]
+        for text in texts:
+            trace.append(_message(update_id, chat_id, text))
+            update_id += 1
+    return trace[:updates]
+
+
+def chat_of(update: dict) -> int:
+    if "message" in update:
+        return update["message"]["chat"]["id"]
+    if "callback_query" in update:
+        return update["callback_query"]["from"]["id"]
+    return 0
+
+
+def make_recording_session(send_latency: float):
+    from aiogram.client.session.base import BaseSession
+    from aiogram.methods import SendMessage
+    from aiogram.types import Chat, Message
+
+    class RecordingSession(BaseSession):
+        """Answers Bot API calls in-process and counts them by method."""
+
+        def __init__(self):
+            super().__init__()
+            self.calls = defaultdict(int)
+            self._message_id = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.calls[type(method).__name__] += 1
+            if send_latency > 0:
+                await asyncio.sleep(send_latency)
+            if isinstance(method, SendMessage):
+                self._message_id += 1
+                return Message(
+                    message_id=self._message_id,
+                    date=datetime.datetime.now(),
+                    chat=Chat(id=method.chat_id, type="private"),
+                    text=method.text,
+                )
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    return RecordingSession()
+
+
+def make_handler_timer(samples: dict):
+    from aiogram import BaseMiddleware
+
+    class HandlerTimer(BaseMiddleware):
+        """Inner middleware recording how long each handler callback takes."""
+
+        async def __call__(self, handler, event, data):
+            name = data["handler"].callback.__name__
+            started = time.perf_counter()
+            try:
+                return await handler(event, data)
+            finally:
+                samples[name].append(time.perf_counter() - started)
+
+    return HandlerTimer()
+
+
+async def replay(dp, bot, trace: list, concurrent: bool) -> tuple:
+    """Feed `trace` into `dp`. Returns (elapsed seconds, per-update latencies)."""
+    latencies = []
+
+    async def feed(update):
+        started = time.perf_counter()
+        await dp.feed_raw_update(bot, update)
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    if not concurrent:
+        for update in trace:
+            await feed(update)
+    else:
+        by_chat = defaultdict(list)
+        for update in trace:
+            by_chat[chat_of(update)].append(update)
+
+        async def run_chat(updates):
+            for update in updates:
+                await feed(update)
+
+        await asyncio.gather(*(run_chat(updates) for updates in by_chat.values()))
+    return time.perf_counter() - started, latencies
+
+
+def print_report(title: str, elapsed: float, latencies: list, samples: dict, chats: int) -> None:
+    p50, p95, p99 = percentiles(latencies)
+    print(f"\n{title}: {len(latencies)} updates from {chats} chats in {elapsed:.2f}s "
+          f"= {len(latencies) / max(elapsed, 1e-9):,.0f} updates/s "
+          f"(update p50 {p50 * 1000:.2f}ms p95 {p95 * 1000:.2f}ms p99 {p99 * 1000:.2f}ms)")
+    print(f"  {'handler':<34} {'calls':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'total s':>9}")
+    for name, values in sorted(samples.items(), key=lambda item: -sum(item[1])):
+        p50, p95, p99 = percentiles(values)
+        print(f"  {name:<34} {len(values):>7} {p50 * 1000:>9.2f} {p95 * 1000:>9.2f} {p99 * 1000:>9.2f} "
+              f"{sum(values):>9.2f}")
+
+
+async def run(args) -> None:
+    weather = FakeOpenWeather(latency=args.weather_latency)
+    tmp_dir = tempfile.mkdtemp(prefix="dispatcher-replay-")
+    os.environ.update({
+        "OPENWEATHER_API_URL": await weather.start(),
+        "WEATHER_API_KEY": "local-replay",
+        "DATABASE_PATH": os.path.join(tmp_dir, "replay.sqlite3"),
+    })
+    os.environ.setdefault("TELEGRAM_BOT_TOKEN", "123456:local-replay-token")
+
+    # Imported only now so that they pick up the environment set above.
+    from aiogram import Bot
+    from aiogram.client.default import DefaultBotProperties
+    from aiogram.enums import ParseMode
+    from core.database.db_connector import engine
+    from core.database.init_types import init_subscription_types
+    from core.database.models import Base
+    bot_module = importlib.import_module("core.bot")
+    http_client = importlib.import_module("utils.http_client")
+    weather_api = importlib.import_module("utils.weather_api")
+    middlewares = importlib.import_module("core.middlewares")
+    tracing = importlib.import_module("utils.tracing")
+    # core.bot enables INFO logging; aiogram would log every replayed update.
+    logging.getLogger("aiogram.event").setLevel(logging.WARNING)
+
+    Base.metadata.create_all(engine)
+    init_subscription_types()
+    await http_client.start_http_client()
+
+    if args.trace:
+        with open(args.trace, encoding="utf-8") as f:
+            trace = [json.loads(line) for line in f if line.strip()]
+    else:
+        trace = synthetic_trace(args.updates, args.chats, args.cities, args.seed)
+    if args.save_trace:
+        with open(args.save_trace, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(update) + "\n" for update in trace)
+    chats = len({chat_of(update) for update in trace})
+
+    session = make_recording_session(args.send_latency)
+    session.middleware(middlewares.TelegramRequestSpans())
+    bot = Bot(token=os.environ["TELEGRAM_BOT_TOKEN"], session=session,
+              default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+    exporter = tracing.TraceExporter(args.export_traces) if args.export_traces else None
+    try:
+        for title, concurrent in (("sequential", False), ("concurrent chats", True)):
+            weather_api.clear_caches()
+            samples = defaultdict(list)
+            dp = bot_module.create_dispatcher(exporter)
+            dp.message.middleware(make_handler_timer(samples))
+            dp.callback_query.middleware(make_handler_timer(samples))
+            elapsed, latencies = await replay(dp, bot, trace, concurrent)
+            print_report(title, elapsed, latencies, samples, chats)
+    finally:
+        if exporter is not None:
+            exporter.close()
+        await http_client.close_http_client()
+        await weather.stop()
+        engine.dispose()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"\nopenweather calls {dict(weather.calls)}; bot API calls {dict(session.calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=2000, help="synthetic trace length")
+    parser.add_argument("--chats", type=int, default=50, help="distinct chats in the synthetic trace")
+    parser.add_argument("--cities", type=int, default=50, help="distinct cities in the synthetic trace")
+    parser.add_argument("--trace", metavar="PATH", help="replay a JSON-lines file of Update objects instead")
+    parser.add_argument("--save-trace", metavar="PATH", help="write the replayed trace as JSON lines")
+    parser.add_argument("--export-traces", metavar="PATH",
+                        help="write every update's span breakdown as JSON lines (see utils/tracing.py)")
+    parser.add_argument("--weather-latency", type=float, default=0.02, help="FakeOpenWeather response delay")
+    parser.add_argument("--send-latency", type=float, default=0.0, help="delay of each Bot API call")
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Local stand-ins for the OpenWeather API and the Telegram Bot API, for load tests
+that must not touch the real services.
+
+FakeOpenWeather serves the weather, group, forecast, air_pollution and geocoding
+endpoints from the recorded fixtures, with configurable latency, a random error
+rate and a per-minute request quota answered with 429 once exhausted.
+FakeTelegram accepts Bot API calls, records every sendMessage with its arrival
+time, and can simulate latency, 429 flood control and users who blocked the bot.
+Updates queued with `push_updates()` are served to getUpdates long polling.
+
+Run both standalone and point the bot at them:
+
+    python -m benchmarks.fake_servers --weather-port 8081 --telegram-port 8082 --weather-latency 0.05
+    OPENWEATHER_API_URL=http://127.0.0.1:8081 TELEGRAM_API_URL=http://127.0.0.1:8082 python -m core.bot
+"""
+import argparse
+import asyncio
+import copy
+import json
+import random
+import time
+import zlib
+from collections import Counter, deque
+
+from aiohttp import web
+
+from benchmarks.hot_paths import load_fixture
+
+
+def _json(payload, status: int = 200) -> web.Response:
+    return web.Response(text=json.dumps(payload), status=status, content_type="application/json")
+
+
+class _FakeServer:
+    def __init__(self):
+        self.app = web.Application()
+        self.url = None
+        self._runner = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving and return the base URL; port 0 picks a free port."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.url = f"http://{bound_host}:{bound_port}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FakeOpenWeather(_FakeServer):
+    """
+    OpenWeather stand-in. Every city name exists; its ID and coordinates are
+    derived from the name, so group requests by ID resolve to the same cities.
+    `quota_per_minute` of 0 disables the 429 quota.
+    """
+
+    def __init__(
+            self,
+            latency: float = 0.05,
+            jitter: float = 0.0,
+            error_rate: float = 0.0,
+            quota_per_minute: int = 0,
+            seed: int = 0,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_per_minute = quota_per_minute
+        self.calls = Counter()
+        self.statuses = Counter()
+        self._random = random.Random(seed)
+        self._window_start = time.monotonic()
+        self._window_calls = 0
+        self._names = {}
+        self._current = load_fixture("current")
+        self._forecast_text = json.dumps(load_fixture("forecast"))
+        self._air = load_fixture("air")
+        self.app.router.add_get("/data/2.5/weather", self._weather)
+        self.app.router.add_get("/data/2.5/group", self._group)
+        self.app.router.add_get("/data/2.5/forecast", self._forecast)
+        self.app.router.add_get("/data/2.5/air_pollution", self._air_pollution)
+        self.app.router.add_get("/geo/1.0/direct", self._geo)
+
+    def _city_id(self, name: str) -> int:
+        city_id = 1_000_000 + zlib.crc32(name.lower().encode()) % 9_000_000
+        self._names[city_id] = name
+        return city_id
+
+    def _coord(self, city_id: int) -> dict:
+        return {"lat": round(-60 + city_id % 12000 / 100, 4), "lon": round(-180 + city_id % 36000 / 100, 4)}
+
+    def _current_payload(self, name: str) -> dict:
+        payload = copy.deepcopy(self._current)
+        city_id = self._city_id(name)
+        payload.update(name=name, id=city_id, coord=self._coord(city_id), dt=int(time.time()))
+        return payload
+
+    async def _gate(self, endpoint: str):
+        """Apply latency, quota and random errors. Returns an error response or None."""
+        self.calls[endpoint] += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        if now - self._window_start >= 60:
+            self._window_start, self._window_calls = now, 0
+        self._window_calls += 1
+        if self.quota_per_minute and self._window_calls > self.quota_per_minute:
+            self.statuses[429] += 1
+            return _json({"cod": 429, "message": "Your account is temporary blocked due to exceeding of "
+                                                 "requests limitation of your subscription type."}, 429)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.statuses[500] += 1
+            return _json({"cod": 500, "message": "Internal error"}, 500)
+        self.statuses[200] += 1
+        return None
+
+    async def _weather(self, request: web.Request) -> web.Response:
+        return await self._gate("weather") or _json(self._current_payload(request.query.get("q", "")))
+
+    async def _group(self, request: web.Request) -> web.Response:
+        error = await self._gate("group")
+        if error is not None:
+            return error
+        items = []
+        for city_id in request.query.get("id", "").split(","):
+            name = self._names.get(int(city_id)) if city_id.isdigit() else None
+            if name is None:
+                continue
+            item = self._current_payload(name)
+            item["sys"]["timezone"] = item.pop("timezone")
+            items.append(item)
+        return _json({"cnt": len(items), "list": items})
+
+    async def _forecast(self, request: web.Request) -> web.Response:
+        return await self._gate("forecast") or web.Response(text=self._forecast_text, content_type="application/json")
+
+    async def _air_pollution(self, request: web.Request) -> web.Response:
+        return await self._gate("air") or _json(self._air)
+
+    async def _geo(self, request: web.Request) -> web.Response:
+        error = await self._gate("geo")
+        if error is not None:
+            return error
+        name = request.query.get("q", "")
+        coord = self._coord(self._city_id(name))
+        return _json([{"name": name, "lat": coord["lat"], "lon": coord["lon"], "country": "XX"}])
+
+
+class FakeTelegram(_FakeServer):
+    """
+    Telegram Bot API stand-in. Every sendMessage is appended to `deliveries` as
+    (chat_id, time.monotonic()). Above `rate_limit` messages per second it answers
+    429 with `retry_after`, like Telegram flood control; chats selected by
+    `blocked_ratio` answer 403. `rate_limit` of 0 disables flood control.
+    getUpdates serves the updates queued with `push_updates()`, honouring
+    `offset` and `limit` and holding the request until updates arrive or the
+    long-poll timeout (capped at 1s) runs out.
+    """
+
+    def __init__(
+            self,
+            latency: float = 0.02,
+            rate_limit: float = 0,
+            retry_after: int = 1,
+            blocked_ratio: float = 0.0,
+    ):
+        super().__init__()
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self.blocked_ratio = blocked_ratio
+        self.calls = Counter()
+        self.statuses = Counter()
+        self.deliveries = []
+        self._recent = deque()
+        self._message_id = 0
+        self._updates = deque()
+        self._updates_available = asyncio.Event()
+        self.app.router.add_route("*", "/bot{token}/{method}", self._method)
+
+    def push_updates(self, updates: list) -> None:
+        """Queue raw Update dicts for getUpdates."""
+        self._updates.extend(updates)
+        self._updates_available.set()
+
+    async def _get_updates(self, params: dict) -> list:
+        offset = int(params.get("offset") or 0)
+        limit = int(params.get("limit") or 100)
+        while self._updates and self._updates[0]["update_id"] < offset:
+            self._updates.popleft()
+        if not self._updates:
+            self._updates_available.clear()
+            timeout = min(float(params.get("timeout") or 0), 1.0)
+            try:
+                await asyncio.wait_for(self._updates_available.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        return [self._updates[i] for i in range(min(limit, len(self._updates)))]
+
+    def _is_blocked(self, chat_id: int) -> bool:
+        return self.blocked_ratio > 0 and zlib.crc32(str(chat_id).encode()) % 10_000 < self.blocked_ratio * 10_000
+
+    def _flood_limited(self) -> bool:
+        if not self.rate_limit:
+            return False
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] >= 1:
+            self._recent.popleft()
+        if len(self._recent) >= self.rate_limit:
+            return True
+        self._recent.append(now)
+        return False
+
+    async def _method(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        self.calls[method] += 1
+        params = dict(await request.post())
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        if method == "getMe":
+            return self._ok({"id": 1, "is_bot": True, "first_name": "Fake bot", "username": "fake_bot"})
+        if method == "getUpdates":
+            return self._ok(await self._get_updates(params))
+        if method != "sendMessage":
+            return self._ok(True)
+
+        chat_id = int(params["chat_id"])
+        if self._flood_limited():
+            return self._error(429, f"Too Many Requests: retry after {self.retry_after}",
+                               {"retry_after": self.retry_after})
+        if self._is_blocked(chat_id):
+            return self._error(403, "Forbidden: bot was blocked by the user")
+
+        self.deliveries.append((chat_id, time.monotonic()))
+        self._message_id += 1
+        return self._ok({
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "text": params.get("text", ""),
+        })
+
+    def _ok(self, result) -> web.Response:
+        self.statuses[200] += 1
+        return _json({"ok": True, "result": result})
+
+    def _error(self, code: int, description: str, parameters: dict = None) -> web.Response:
+        self.statuses[code] += 1
+        payload = {"ok": False, "error_code": code, "description": description}
+        if parameters:
+            payload["parameters"] = parameters
+        return _json(payload, code)
+
+
+def add_server_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--weather-latency", type=float, default=0.05, help="OpenWeather response delay, seconds")
+    parser.add_argument("--weather-jitter", type=float, default=0.02, help="extra random OpenWeather delay")
+    parser.add_argument("--weather-error-rate", type=float, default=0.0, help="share of OpenWeather 500s")
+    parser.add_argument("--weather-quota", type=int, default=0, help="OpenWeather calls per minute before 429")
+    parser.add_argument("--telegram-latency", type=float, default=0.02, help="Bot API response delay, seconds")
+    parser.add_argument("--telegram-rate-limit", type=float, default=0, help="Bot API messages/s before 429")
+    parser.add_argument("--blocked", type=float, default=0.0, help="share of chats that blocked the bot")
+
+
+def servers_from_args(args) -> tuple:
+    weather = FakeOpenWeather(
+        latency=args.weather_latency,
+        jitter=args.weather_jitter,
+        error_rate=args.weather_error_rate,
+        quota_per_minute=args.weather_quota,
+    )
+    telegram = FakeTelegram(
+        latency=args.telegram_latency,
+        rate_limit=args.telegram_rate_limit,
+        blocked_ratio=args.blocked,
+    )
+    return weather, telegram
+
+
+async def _serve(args):
+    weather, telegram = servers_from_args(args)
+    weather_url = await weather.start(args.host, args.weather_port)
+    telegram_url = await telegram.start(args.host, args.telegram_port)
+    print(f"OPENWEATHER_API_URL={weather_url}")
+    print(f"TELEGRAM_API_URL={telegram_url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(f"openweather {dict(weather.calls)} {dict(weather.statuses)}; "
+                  f"telegram {dict(telegram.calls)} {dict(telegram.statuses)}")
+    finally:
+        await weather.stop()
+        await telegram.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--weather-port", type=int, default=8081)
+    parser.add_argument("--telegram-port", type=int, default=8082)
+    add_server_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Compare the compact ParsedForecast against raw OpenWeather forecast dicts:
+memory held per cached city and render throughput of the forecast formatters.
+
+The dict-based formatters below are the implementations ParsedForecast replaced;
+they are kept here only as the comparison baseline, and the script checks that
+both versions produce identical messages.
+
+    python -m benchmarks.forecast_compact --cities 1000
+"""
+import argparse
+import gc
+import json
+import os
+import timeit
+import tracemalloc
+from collections import defaultdict
+
+from utils.forecast import ParsedForecast
+from utils.format_message import (
+    get_weather_emoji, group_forecasts_by_day, format_forecast_message, format_hourly_message,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "forecast.json")
+
+
+def dict_group_forecasts_by_day(forecasts: list, max_intervals: int) -> dict:
+    grouped = defaultdict(list)
+    for f in forecasts[:max_intervals]:
+        date = f["dt_txt"].split()[0]
+        grouped[date].append(f)
+    return grouped
+
+
+def dict_format_forecast_message(city: str, grouped: dict, days: int) -> str:
+    result = f"🌤 <b>Weather forecast for {city} (next {days} day(s)):</b>\n"
+    for date, entries in grouped.items():
+        result += f"\n\n<b>{date}</b>\n"
+        for f in entries:
+            time = f["dt_txt"].split()[1][:5]
+            temp = f["main"]["temp"]
+            feels = f["main"].get("feels_like", temp)
+            desc = f["weather"][0]["description"].capitalize()
+            wind = f["wind"]["speed"]
+            humidity = f["main"]["humidity"]
+            icon = get_weather_emoji(desc)
+            result += (
+                f"{time} {icon} {desc}, "
+                f"{temp:.1f}°C (feels {feels:.1f}°C), "
+                f"💨 {wind} m/s, 💧 {humidity}%\n"
+            )
+    return result
+
+
+def dict_format_hourly_message(city: str, forecasts: list) -> str:
+    result = f"🕒 <b>Hourly forecast for {city} (next 24h):</b>\n"
+    for f in forecasts[:8]:
+        dt_txt = f["dt_txt"]
+        time = dt_txt.split(" ")[1][:5]
+        temp = f["main"]["temp"]
+        feels = f["main"].get("feels_like", temp)
+        desc = f["weather"][0]["description"].capitalize()
+        wind = f["wind"]["speed"]
+        humidity = f["main"]["humidity"]
+        icon = get_weather_emoji(desc)
+        result += (
+            f"\n<b>{time}</b> {icon} {desc}, "
+            f"{temp:.1f}°C (feels {feels:.1f}°C), "
+            f"💨 {wind} m/s, 💧 {humidity}%"
+        )
+    return result
+
+
+def measure_memory(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    held = [build() for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size
+
+
+def ops_per_sec(func, seconds: float = 1.0) -> float:
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    runs = max(1, int(number * seconds / max(elapsed, 1e-9)))
+    return runs / timer.timeit(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cities", type=int, default=1000, help="number of cached forecasts for the memory test")
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        raw = json.load(f)
+    entries = raw["list"]
+    parsed = ParsedForecast.from_json(entries)
+    city, days = raw["city"]["name"], 5
+
+    assert dict_format_hourly_message(city, entries) == format_hourly_message(city, parsed)
+    assert dict_format_forecast_message(city, dict_group_forecasts_by_day(entries, 40), days) == \
+        format_forecast_message(city, parsed, group_forecasts_by_day(parsed, 40), days)
+
+    raw_text = json.dumps(raw)
+    dict_bytes = measure_memory(lambda: json.loads(raw_text), args.cities)
+    compact_bytes = measure_memory(lambda: ParsedForecast.from_json(json.loads(raw_text)["list"]), args.cities)
+    print(f"memory for {args.cities} cached forecasts:")
+    print(f"  dict      {dict_bytes / 1024:>10.1f} KiB  ({dict_bytes / args.cities:,.0f} B/city)")
+    print(f"  compact   {compact_bytes / 1024:>10.1f} KiB  ({compact_bytes / args.cities:,.0f} B/city)")
+
+    benches = [
+        ("parse forecast", None, lambda: ParsedForecast.from_json(entries)),
+        ("hourly message",
+         lambda: dict_format_hourly_message(city, entries),
+         lambda: format_hourly_message(city, parsed)),
+        ("5-day forecast message",
+         lambda: dict_format_forecast_message(city, dict_group_forecasts_by_day(entries, 40), days),
+         lambda: format_forecast_message(city, parsed, group_forecasts_by_day(parsed, 40), days)),
+    ]
+    print(f"\n{'render':<24} {'dict ops/s':>12} {'compact ops/s':>14}")
+    for name, dict_func, compact_func in benches:
+        dict_ops = f"{ops_per_sec(dict_func):>12,.0f}" if dict_func else f"{'-':>12}"
+        print(f"{name:<24} {dict_ops} {ops_per_sec(compact_func):>14,.0f}")
+
+
+if __name__ == "__main__":
+    main()
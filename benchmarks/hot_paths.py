@@ -0,0 +1,171 @@
+"""
+Micro-benchmarks for the per-notification hot paths: every formatter in
+utils/format_message.py, forecast grouping, city transliteration and the
+weather emoji lookup, run offline against recorded OpenWeather responses in
+benchmarks/fixtures/.
+
+For each case it reports ops/sec, the peak memory allocated during one call and
+the number of memory blocks still held per call afterwards (the result plus
+anything the call caches). Results can be saved as a baseline and later runs
+compared against it; the script exits with status 1 if any case got slower or
+allocates more than the allowed tolerance. Speeds are compared relative to a
+fixed pure-Python reference loop timed in the same run, so a busier or faster
+machine does not show up as a regression or an improvement.
+
+    python -m benchmarks.hot_paths
+    python -m benchmarks.hot_paths --save benchmarks/baseline.json
+    python -m benchmarks.hot_paths --compare benchmarks/baseline.json --tolerance 0.2
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import timeit
+import tracemalloc
+
+from utils.forecast import ParsedForecast
+from utils.format_message import (
+    get_weather_emoji, group_forecasts_by_day, format_forecast_message, format_hourly_message,
+    format_weather_message, format_air_quality_message, format_details_message,
+    format_sunrise_sunset_message, format_wind_message, get_time_text,
+)
+from utils.translit_utils import transliterate_city
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+REFERENCE = "_reference"
+
+
+def load_fixture(name: str):
+    with open(os.path.join(FIXTURES_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ops_per_sec(func, seconds: float = 1.0, repeat: int = 5) -> float:
+    """Best of `repeat` timing rounds sharing a budget of about `seconds`; the best round is the least noisy."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    runs = max(1, int(number * seconds / repeat / max(elapsed, 1e-9)))
+    return runs / min(timer.repeat(repeat=repeat, number=runs))
+
+
+def _reference_loop():
+    total = 0
+    for i in range(1000):
+        total += i % 7
+    return total
+
+
+def allocations(func, calls: int = 200) -> tuple:
+    """Return (peak bytes allocated during one call, memory blocks held per call)."""
+    func()
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+
+    kept = [None] * calls
+    before = tracemalloc.take_snapshot()
+    for i in range(calls):
+        kept[i] = func()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return peak - base, max(blocks, 0) / calls
+
+
+def build_cases() -> dict:
+    current = load_fixture("current")
+    forecast_raw = load_fixture("forecast")
+    air = load_fixture("air")
+    forecast = ParsedForecast.from_json(forecast_raw["list"])
+    city = forecast_raw["city"]["name"]
+    grouped = group_forecasts_by_day(forecast, 16)
+
+    return {
+        "format_weather_message": lambda: format_weather_message(current),
+        "format_details_message": lambda: format_details_message(current),
+        "format_sunrise_sunset_message": lambda: format_sunrise_sunset_message(current),
+        "format_wind_message": lambda: format_wind_message(current),
+        "format_air_quality_message": lambda: format_air_quality_message(city, air["list"][0]),
+        "format_hourly_message": lambda: format_hourly_message(city, forecast),
+        "format_forecast_message[2d]": lambda: format_forecast_message(city, forecast, grouped, 2),
+        "group_forecasts_by_day[5d]": lambda: group_forecasts_by_day(forecast, 40),
+        "parse_forecast": lambda: ParsedForecast.from_json(forecast_raw["list"]),
+        "get_weather_emoji": lambda: get_weather_emoji("Light rain"),
+        "get_time_text": lambda: get_time_text("07:30"),
+        "transliterate_city[cyrillic]": lambda: transliterate_city("Київ"),
+        "transliterate_city[latin]": lambda: transliterate_city("London"),
+    }
+
+
+def run(cases: dict, seconds: float) -> dict:
+    results = {REFERENCE: {"ops_per_sec": ops_per_sec(_reference_loop, seconds), "peak_bytes": 0, "blocks": 0}}
+    for name, func in cases.items():
+        peak, blocks = allocations(func)
+        results[name] = {"ops_per_sec": ops_per_sec(func, seconds), "peak_bytes": peak, "blocks": blocks}
+    return results
+
+
+def relative_speed(results: dict, baseline: dict, name: str) -> float:
+    """Speed of `name` relative to the baseline, corrected by how the reference loop's speed changed."""
+    machine = results[REFERENCE]["ops_per_sec"] / baseline[REFERENCE]["ops_per_sec"]
+    return results[name]["ops_per_sec"] / baseline[name]["ops_per_sec"] / machine
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return the names of cases that regressed against `baseline` by more than `tolerance`."""
+    regressed = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or name == REFERENCE:
+            continue
+        slower = relative_speed(results, baseline, name) < 1 - tolerance
+        heavier = result["blocks"] > base["blocks"] * (1 + tolerance) + 0.5
+        if slower or heavier:
+            regressed.append(name)
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=1.0, help="timing budget per case")
+    parser.add_argument("--filter", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    cases = {name: func for name, func in build_cases().items() if args.filter in name}
+    results = run(cases, args.seconds)
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if REFERENCE not in baseline:
+            parser.error(f"{args.compare} has no {REFERENCE} entry; re-save the baseline")
+
+    print(f"{'case':<32} {'ops/s':>12} {'peak B/call':>12} {'blocks/call':>12} {'vs baseline':>12}")
+    for name, r in results.items():
+        delta = ""
+        if name in baseline and name != REFERENCE:
+            delta = f"{relative_speed(results, baseline, name) - 1:+.1%}"
+        print(f"{name:<32} {r['ops_per_sec']:>12,.0f} {r['peak_bytes']:>12,} {r['blocks']:>12.1f} {delta:>12}")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=1, sort_keys=True)
+        print(f"\nbaseline saved to {args.save}")
+
+    if args.compare:
+        regressed = compare(results, baseline, args.tolerance)
+        if regressed:
+            print(f"\nregressions beyond {args.tolerance:.0%}: {', '.join(regressed)}")
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Load-test check_and_send_notifications against the local OpenWeather and
+Telegram stand-ins from benchmarks/fake_servers.py.
+
+A temporary SQLite database is seeded with --users users and their
+subscriptions, spread over --slots consecutive minutes and --cities cities.
+Each slot is then run through the real scheduler path: database load, batched
+and snapshot fetches, rendering and the rate-limited delivery queue. For every
+slot the script reports delivery latency percentiles (from slot start to the
+message reaching the fake Bot API), OpenWeather calls by endpoint and send
+throughput.
+
+    python -m benchmarks.scheduler_load --users 100000 --slots 10 --cities 500 --send-rate 1000
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.fake_servers import add_server_arguments, servers_from_args
+
+FIRST_MINUTE = 8 * 60
+
+
+def percentiles(values: list) -> tuple:
+    """Return (p50, p95, p99) of `values`."""
+    if not values:
+        return 0.0, 0.0, 0.0
+    if len(values) == 1:
+        return values[0], values[0], values[0]
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+def configure_environment(args, weather_url: str, telegram_url: str, tmp_dir: str) -> None:
+    """Point the bot's modules at the stand-ins and a scratch database; must run before importing them."""
+    os.environ.update({
+        "OPENWEATHER_API_URL": weather_url,
+        "TELEGRAM_API_URL": telegram_url,
+        "TELEGRAM_BOT_TOKEN": "123456:local-load-test-token",
+        "WEATHER_API_KEY": "local-load-test",
+        "DATABASE_PATH": os.path.join(tmp_dir, "load.sqlite3"),
+        "TELEGRAM_GLOBAL_RATE": str(args.send_rate),
+        "TELEGRAM_SEND_WORKERS": str(args.send_workers),
+    })
+    os.environ.pop("WEATHER_L2_CACHE_PATH", None)
+
+
+def seed_database(args) -> int:
+    from sqlalchemy import insert
+
+    from core.database.db_connector import engine, SessionLocal
+    from core.database.init_types import DEFAULT_TYPES
+    from core.database.models import Base, User, Subscription, SubscriptionType
+    from core.schedule_wheel import minute_to_time
+
+    rnd = random.Random(args.seed)
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.execute(insert(SubscriptionType), DEFAULT_TYPES)
+        type_ids = [row.id for row in db.query(SubscriptionType.id)]
+        db.execute(insert(User), [{"id": i + 1, "telegram_id": 10_000_000 + i} for i in range(args.users)])
+
+        cities = [f"city{i:05d}" for i in range(args.cities)]
+        rows = []
+        for user_id in range(1, args.users + 1):
+            minute = FIRST_MINUTE + rnd.randrange(args.slots)
+            for type_id in rnd.sample(type_ids, min(args.subs_per_user, len(type_ids))):
+                rows.append({
+                    "user_id": user_id, "city": rnd.choice(cities), "type_id": type_id,
+                    "time": minute_to_time(minute), "minute": minute,
+                })
+        for start in range(0, len(rows), 10_000):
+            db.execute(insert(Subscription), rows[start:start + 10_000])
+        db.commit()
+    return len(rows)
+
+
+async def run(args) -> None:
+    weather, telegram = servers_from_args(args)
+    tmp_dir = tempfile.mkdtemp(prefix="scheduler-load-")
+    configure_environment(args, await weather.start(), await telegram.start(), tmp_dir)
+
+    subscriptions = seed_database(args)
+    # Imported only now so that they pick up the environment set above.
+    config = importlib.import_module("core.config")
+    scheduler = importlib.import_module("core.notification_scheduler")
+    prefetcher = importlib.import_module("core.prefetcher")
+    http_client = importlib.import_module("utils.http_client")
+    wheel = importlib.import_module("core.schedule_wheel")
+    async_crud = importlib.import_module("crud.async_subscription")
+    db_connector = importlib.import_module("core.database.db_connector")
+
+    await http_client.start_http_client()
+    wheel.schedule_wheel.bind_loop()
+    wheel.schedule_wheel.load(await async_crud.get_subscription_minutes())
+    print(f"seeded {args.users} users, {subscriptions} subscriptions, {args.cities} cities, {args.slots} slots\n")
+
+    print(f"{'slot':<6} {'due':>7} {'sent':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'msg/s':>8}  upstream calls")
+    all_latencies = []
+    started_all = time.monotonic()
+    try:
+        for minute in range(FIRST_MINUTE, FIRST_MINUTE + args.slots):
+            due = len(wheel.schedule_wheel.due(minute))
+            if args.prefetch:
+                await prefetcher.prefetch_slot(minute, spread=0)
+            calls_before = weather.calls.copy()
+            delivered_before = len(telegram.deliveries)
+            slot_started = time.monotonic()
+            await scheduler.check_and_send_notifications(minute)
+            slot_finished = time.monotonic()
+
+            latencies = [at - slot_started for _, at in telegram.deliveries[delivered_before:]]
+            all_latencies.extend(latencies)
+            p50, p95, p99 = percentiles(latencies)
+            rate = len(latencies) / max(slot_finished - slot_started, 1e-9)
+            calls = dict(weather.calls - calls_before)
+            print(f"{wheel.minute_to_time(minute):<6} {due:>7} {len(latencies):>7} {p50:>7.2f}s {p95:>7.2f}s "
+                  f"{p99:>7.2f}s {rate:>8.1f}  {calls}")
+    finally:
+        await scheduler.delivery.close()
+        await config.bot.session.close()
+        await http_client.close_http_client()
+        await weather.stop()
+        await telegram.stop()
+        db_connector.engine.dispose()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    elapsed = time.monotonic() - started_all
+    p50, p95, p99 = percentiles(all_latencies)
+    print(f"\ntotal: {len(all_latencies)} delivered in {elapsed:.1f}s ({len(all_latencies) / elapsed:.1f} msg/s), "
+          f"latency p50 {p50:.2f}s p95 {p95:.2f}s p99 {p99:.2f}s")
+    print(f"openweather calls {dict(weather.calls)}, statuses {dict(weather.statuses)}")
+    print(f"telegram statuses {dict(telegram.statuses)}, delivery queue {scheduler.delivery.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--subs-per-user", type=int, default=1, help="subscription types per user (1-6)")
+    parser.add_argument("--slots", type=int, default=5, help="consecutive minutes the subscriptions are spread over")
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--send-rate", type=float, default=1000,
+                        help="TELEGRAM_GLOBAL_RATE for the run; the production default of 25 dominates latency")
+    parser.add_argument("--send-workers", type=int, default=100, help="TELEGRAM_SEND_WORKERS for the run")
+    parser.add_argument("--prefetch", action="store_true", help="warm each slot with the prefetcher first")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="show the bot's own INFO logs")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Compare SQLite read/write concurrency with the default connection settings
+and with the tuned profile from core/database/db_connector.py.
+
+Writer threads add subscriptions (one commit each) while reader threads run the
+scheduler's due-notification query.
+
+    python -m benchmarks.sqlite_concurrency --seconds 5 --writers 2 --readers 4
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from core.database.db_connector import apply_sqlite_pragmas
+from core.database.init_types import DEFAULT_TYPES
+from core.database.models import Base, SubscriptionType
+from crud.subscription import add_subscription, get_due_notifications, get_subscriptions_by_time
+
+
+def make_session_factory(path: str, tuned: bool):
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    if tuned:
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        for t in DEFAULT_TYPES:
+            db.add(SubscriptionType(**t))
+        db.commit()
+    return engine, factory
+
+
+def run_profile(tuned: bool, seconds: float, writers: int, readers: int) -> dict:
+    tmp_dir = tempfile.mkdtemp(prefix="sqlite-bench-")
+    engine, factory = make_session_factory(os.path.join(tmp_dir, "bench.sqlite3"), tuned)
+    stop = threading.Event()
+    lock = threading.Lock()
+    result = {"writes": 0, "reads": 0, "locked": 0, "read_latency": [], "write_latency": []}
+    codes = [t["code"] for t in DEFAULT_TYPES]
+
+    def writer(worker: int):
+        rnd = random.Random(worker)
+        n = 0
+        while not stop.is_set():
+            n += 1
+            started = time.perf_counter()
+            try:
+                with factory() as db:
+                    add_subscription(
+                        db, worker * 10_000_000 + n, f"city{rnd.randrange(500)}",
+                        rnd.choice(codes), f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}",
+                    )
+            except OperationalError:
+                with lock:
+                    result["locked"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                result["writes"] += 1
+                result["write_latency"].append(elapsed)
+
+    def reader(worker: int):
+        rnd = random.Random(1000 + worker)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with factory() as db:
+                    time_str = f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}"
+                    ids = [sub.id for sub in get_subscriptions_by_time(db, time_str)]
+                    get_due_notifications(db, ids)
+            except OperationalError:
+                with lock:
+                    result["locked"] += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                result["reads"] += 1
+                result["read_latency"].append(elapsed)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    try:
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+    finally:
+        stop.set()
+        for thread in threads:
+            if thread.is_alive():
+                thread.join()
+        engine.dispose()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    return result
+
+
+def _p95(values):
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=20)[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'profile':<8} {'writes/s':>10} {'reads/s':>10} {'locked':>7} {'write p95':>11} {'read p95':>10}")
+    for name, tuned in (("default", False), ("tuned", True)):
+        r = run_profile(tuned, args.seconds, args.writers, args.readers)
+        print(
+            f"{name:<8} {r['writes'] / args.seconds:>10.1f} {r['reads'] / args.seconds:>10.1f} "
+            f"{r['locked']:>7} {_p95(r['write_latency']) * 1000:>9.2f}ms {_p95(r['read_latency']) * 1000:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
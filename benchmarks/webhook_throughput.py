@@ -0,0 +1,186 @@
+"""
+Compare update throughput and latency of long polling and webhook mode.
+
+The bot's Dispatcher runs against local OpenWeather and Telegram stand-ins
+(benchmarks/fake_servers.py) with a scratch database. The same synthetic trace
+as benchmarks.dispatcher_replay is delivered twice:
+
+  polling  queued on FakeTelegram and fetched by aiogram's start_polling
+  webhook  POSTed to core.webhook.WebhookServer over --connections connections
+           (Telegram's max_connections), with the secret token header
+
+Updates are offered all at once, or at --rate updates per second. For each
+mode the script reports updates per second and the latency from an update
+being offered to its handlers finishing.
+
+    python -m benchmarks.webhook_throughput --updates 2000 --chats 200
+    python -m benchmarks.webhook_throughput --rate 200 --telegram-latency 0.05
+"""
+import argparse
+import asyncio
+import importlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.dispatcher_replay import synthetic_trace
+from benchmarks.fake_servers import add_server_arguments, servers_from_args
+from benchmarks.scheduler_load import percentiles
+
+SECRET = "local-benchmark-secret"
+
+
+def make_completion_tracker(expected: int):
+    from aiogram import BaseMiddleware
+
+    class CompletionTracker(BaseMiddleware):
+        """Outer update middleware recording when each update's handling finished."""
+
+        def __init__(self):
+            self.finished = {}
+            self.all_finished = asyncio.Event()
+
+        async def __call__(self, handler, event, data):
+            try:
+                return await handler(event, data)
+            finally:
+                self.finished[event.update_id] = time.perf_counter()
+                if len(self.finished) >= expected:
+                    self.all_finished.set()
+
+    return CompletionTracker()
+
+
+async def offer(trace: list, rate: float, deliver) -> dict:
+    """Call `deliver(update)` for every update, at `rate` per second (0: all at once). Returns offer times."""
+    offered = {}
+    started = time.perf_counter()
+    for index, update in enumerate(trace):
+        if rate > 0:
+            delay = started + index / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        offered[update["update_id"]] = time.perf_counter()
+        deliver(update)
+    return offered
+
+
+async def run_polling(dp, bot, telegram, trace: list, rate: float, tracker) -> dict:
+    polling = asyncio.create_task(
+        dp.start_polling(bot, handle_signals=False, close_bot_session=False, polling_timeout=1)
+    )
+    offered = await offer(trace, rate, lambda update: telegram.push_updates([update]))
+    await tracker.all_finished.wait()
+    await dp.stop_polling()
+    await polling
+    return offered
+
+
+async def run_webhook(dp, bot, trace: list, rate: float, tracker, args) -> dict:
+    import aiohttp
+    from core.webhook import SECRET_HEADER, WebhookServer
+
+    server = WebhookServer(dp, bot, SECRET, max_concurrency=args.max_concurrency)
+    url = await server.start("127.0.0.1", 0)
+    posts = set()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=args.connections)) as client:
+        async def post(update):
+            async with client.post(url, json=update, headers={SECRET_HEADER: SECRET}) as response:
+                response.raise_for_status()
+
+        def deliver(update):
+            task = asyncio.create_task(post(update))
+            posts.add(task)
+            task.add_done_callback(posts.discard)
+
+        offered = await offer(trace, rate, deliver)
+        await tracker.all_finished.wait()
+        if posts:
+            await asyncio.gather(*posts)
+    await server.stop()
+    return offered
+
+
+def print_report(mode: str, offered: dict, finished: dict, sent: int) -> None:
+    latencies = [finished[update_id] - at for update_id, at in offered.items()]
+    elapsed = max(finished.values()) - min(offered.values())
+    p50, p95, p99 = percentiles(latencies)
+    print(f"{mode:<8} {len(latencies):>7} {elapsed:>8.2f}s {len(latencies) / elapsed:>9.0f} "
+          f"{p50 * 1000:>9.1f} {p95 * 1000:>9.1f} {p99 * 1000:>9.1f} {sent:>8}")
+
+
+async def run(args) -> None:
+    weather, telegram = servers_from_args(args)
+    tmp_dir = tempfile.mkdtemp(prefix="webhook-throughput-")
+    os.environ.update({
+        "OPENWEATHER_API_URL": await weather.start(),
+        "TELEGRAM_API_URL": await telegram.start(),
+        "TELEGRAM_BOT_TOKEN": "123456:local-benchmark-token",
+        "WEATHER_API_KEY": "local-benchmark",
+        "DATABASE_PATH": os.path.join(tmp_dir, "webhook.sqlite3"),
+        "SLOW_UPDATE_MS": "600000",
+    })
+    os.environ.pop("WEATHER_L2_CACHE_PATH", None)
+
+    # Imported only now so that they pick up the environment set above.
+    from core.database.db_connector import engine
+    from core.database.init_types import init_subscription_types
+    from core.database.models import Base
+    config = importlib.import_module("core.config")
+    bot_module = importlib.import_module("core.bot")
+    http_client = importlib.import_module("utils.http_client")
+    weather_api = importlib.import_module("utils.weather_api")
+    logging.getLogger("aiogram").setLevel(logging.WARNING)
+
+    Base.metadata.create_all(engine)
+    init_subscription_types()
+    await http_client.start_http_client()
+    trace = synthetic_trace(args.updates, args.chats, args.cities, args.seed)
+    rate = f"{args.rate:g}/s" if args.rate else "all at once"
+    print(f"{len(trace)} updates from {args.chats} chats, offered {rate}\n")
+    print(f"{'mode':<8} {'updates':>7} {'elapsed':>9} {'updates/s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+          f"{'p99 ms':>9} {'sent':>8}")
+    try:
+        for mode in args.modes:
+            weather_api.clear_caches()
+            dp = bot_module.create_dispatcher()
+            tracker = make_completion_tracker(len(trace))
+            dp.update.outer_middleware(tracker)
+            sent_before = len(telegram.deliveries)
+            if mode == "polling":
+                offered = await run_polling(dp, config.bot, telegram, trace, args.rate, tracker)
+            else:
+                offered = await run_webhook(dp, config.bot, trace, args.rate, tracker, args)
+            print_report(mode, offered, tracker.finished, len(telegram.deliveries) - sent_before)
+    finally:
+        await config.bot.session.close()
+        await http_client.close_http_client()
+        await weather.stop()
+        await telegram.stop()
+        engine.dispose()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"\nopenweather calls {dict(weather.calls)}; bot API calls {dict(telegram.calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--chats", type=int, default=200)
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--rate", type=float, default=0, help="updates offered per second; 0 offers all at once")
+    parser.add_argument("--modes", nargs="+", choices=("polling", "webhook"), default=["polling", "webhook"])
+    parser.add_argument("--connections", type=int, default=40, help="concurrent webhook connections")
+    parser.add_argument("--max-concurrency", type=int, default=100, help="WEBHOOK_MAX_CONCURRENCY for the run")
+    parser.add_argument("--seed", type=int, default=0)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Measure how update throughput scales with the number of worker processes
+(core.workers.WorkerPool, UPDATE_WORKERS).
+
+The fake OpenWeather and Telegram services from benchmarks/fake_servers.py run
+in their own process so they do not compete with the front process. For every
+worker count in --workers a pool is started and warmed up with one /start per
+worker, so process start-up is not measured. The synthetic trace from
+benchmarks.dispatcher_replay is then fed at once and the script reports
+updates per second and latency percentiles from feeding to the worker's
+acknowledgement. Scaling is bounded by the CPU cores available (shown in the
+header). Finally it checks that every subscription made in the workers reached
+the front process's schedule wheel, which the scheduler reads.
+
+    python -m benchmarks.worker_scaling --workers 1 2 4 8 --updates 5000 --chats 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.dispatcher_replay import _message, synthetic_trace
+from benchmarks.scheduler_load import percentiles
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_for_port(port: int, timeout: float = 15) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def run_pool(workers: int, trace: list, args) -> tuple:
+    """Returns (elapsed seconds, per-update latencies) of feeding `trace` to a fresh pool."""
+    from core.workers import WorkerPool
+
+    finished = {}
+    pool = WorkerPool(workers, args.max_concurrency,
+                      on_processed=lambda update_id: finished.__setitem__(update_id, time.perf_counter()))
+    pool.start()
+    try:
+        for index in range(workers):
+            pool.feed(_message(10 ** 9 + index, workers * 1000 + index, "/start"))
+        await pool.drain()
+
+        started = time.perf_counter()
+        for update in trace:
+            pool.feed(update)
+        await pool.drain()
+        elapsed = time.perf_counter() - started
+    finally:
+        await pool.stop()
+    return elapsed, [finished[update["update_id"]] - started for update in trace]
+
+
+async def run(args) -> None:
+    weather_port, telegram_port = free_port(), free_port()
+    servers = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_servers",
+         "--weather-port", str(weather_port), "--telegram-port", str(telegram_port),
+         "--weather-latency", str(args.weather_latency), "--weather-jitter", "0",
+         "--telegram-latency", str(args.telegram_latency)],
+        stdout=subprocess.DEVNULL,
+    )
+    tmp_dir = tempfile.mkdtemp(prefix="worker-scaling-")
+    os.environ.update({
+        "OPENWEATHER_API_URL": f"http://127.0.0.1:{weather_port}",
+        "TELEGRAM_API_URL": f"http://127.0.0.1:{telegram_port}",
+        "TELEGRAM_BOT_TOKEN": "123456:local-benchmark-token",
+        "WEATHER_API_KEY": "local-benchmark",
+        "DATABASE_PATH": os.path.join(tmp_dir, "workers.sqlite3"),
+        "SLOW_UPDATE_MS": "600000",
+        "METRICS_PORT": "0",
+        "LOG_LEVEL": "WARNING",
+    })
+    os.environ.pop("WEATHER_L2_CACHE_PATH", None)
+    os.environ.pop("TRACE_EXPORT_PATH", None)
+
+    # Imported only now so that they pick up the environment set above.
+    from core.database.db_connector import engine
+    from core.database.init_types import init_subscription_types
+    from core.database.models import Base
+    from core.schedule_wheel import schedule_wheel
+    from crud.async_subscription import get_subscription_minutes
+
+    try:
+        await wait_for_port(weather_port)
+        await wait_for_port(telegram_port)
+        Base.metadata.create_all(engine)
+        init_subscription_types()
+        trace = synthetic_trace(args.updates, args.chats, args.cities, args.seed)
+        print(f"{len(trace)} updates from {args.chats} chats, {os.cpu_count()} CPUs\n")
+        print(f"{'workers':>7} {'elapsed':>9} {'updates/s':>9} {'speedup':>8} {'p50 ms':>9} {'p95 ms':>9} "
+              f"{'p99 ms':>9}")
+        baseline = None
+        for workers in args.workers:
+            elapsed, latencies = await run_pool(workers, trace, args)
+            throughput = len(trace) / elapsed
+            baseline = baseline or throughput
+            p50, p95, p99 = percentiles(latencies)
+            print(f"{workers:>7} {elapsed:>8.2f}s {throughput:>9.0f} {throughput / baseline:>7.2f}x "
+                  f"{p50 * 1000:>9.1f} {p95 * 1000:>9.1f} {p99 * 1000:>9.1f}")
+
+        stored = dict(await get_subscription_minutes())
+        scheduled = {sub_id: minute for sub_id, minute in stored.items() if sub_id in schedule_wheel.due(minute)}
+        print(f"\nschedule wheel: {len(scheduled)} of {len(stored)} subscriptions made in workers")
+        if len(scheduled) != len(stored) or len(schedule_wheel) != len(stored):
+            raise SystemExit("the front process's schedule wheel is out of sync with the database")
+    finally:
+        servers.terminate()
+        servers.wait()
+        engine.dispose()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="worker counts to compare")
+    parser.add_argument("--updates", type=int, default=3000)
+    parser.add_argument("--chats", type=int, default=300)
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--max-concurrency", type=int, default=100, help="WORKER_MAX_CONCURRENCY for the run")
+    parser.add_argument("--weather-latency", type=float, default=0.01, help="fake OpenWeather response delay")
+    parser.add_argument("--telegram-latency", type=float, default=0.005, help="fake Bot API response delay")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
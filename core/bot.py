@@ -1,26 +1,120 @@
 import logging
 import asyncio
+from typing import Optional
 
 from aiogram import Dispatcher
 
-from core.config import bot
+from core.config import (
+    bot, LOG_LEVEL, HTTP_POOL_SIZE, HTTP_POOL_PER_HOST, HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_DNS_CACHE_TTL, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT, METRICS_HOST, METRICS_PORT,
+    SLOW_UPDATE_MS, TRACE_EXPORT_PATH, LOOP_WATCHDOG_INTERVAL, LOOP_LAG_THRESHOLD_MS,
+    LOOP_LAG_REPORT_INTERVAL, LOOP_DEBUG_DB, UPDATES_MODE, WEBHOOK_URL, WEBHOOK_HOST, WEBHOOK_PORT,
+    WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_MAX_CONCURRENCY, WEBHOOK_MAX_CONNECTIONS, UPDATE_WORKERS,
+    WORKER_MAX_CONCURRENCY, SCHEDULER_ENABLED,
+)
+from core.database.db_connector import engine, run_periodic_optimize
 from core.database.init_types import init_subscription_types
-from core.notification_scheduler import start_scheduler
+from core.middlewares import HandlerMetricsMiddleware, UpdateTracingMiddleware, TelegramRequestSpans
+from core.notification_scheduler import start_scheduler, stop_scheduler
+from core.prefetcher import start_prefetcher, stop_prefetcher
+from core.webhook import check_webhook_settings, run_webhook
+from core.workers import WorkerPool, run_polling_front
+from handlers.admin_handler import register_admin
 from handlers.subscribe_handler import register_subscribe
 from handlers.weather_handler import register_weather, fallback_handler
+from utils.http_client import start_http_client, close_http_client
+from utils.loop_watchdog import LoopWatchdog
+from utils.metrics import start_metrics_server, stop_metrics_server
+from utils.tracing import TraceExporter
+from utils.weather_api import close_cache_store
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(level=LOG_LEVEL)
 
 
-async def main() -> None:
+def create_dispatcher(trace_exporter: Optional[TraceExporter] = None) -> Dispatcher:
     dp = Dispatcher()
-
+    dp.update.outer_middleware(UpdateTracingMiddleware(SLOW_UPDATE_MS / 1000, trace_exporter))
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
     register_weather(dp)
     register_subscribe(dp)
+    register_admin(dp)
     dp.message.register(fallback_handler)
-    start_scheduler()
+    return dp
+
+
+async def start_http_pool() -> None:
+    await start_http_client(
+        pool_size=HTTP_POOL_SIZE,
+        pool_per_host=HTTP_POOL_PER_HOST,
+        keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl=HTTP_DNS_CACHE_TTL,
+        connect_timeout=HTTP_CONNECT_TIMEOUT,
+        read_timeout=HTTP_READ_TIMEOUT,
+    )
+
+
+async def main() -> None:
+    if UPDATES_MODE == "webhook":
+        check_webhook_settings(WEBHOOK_URL, WEBHOOK_SECRET)
+    watchdog = LoopWatchdog(
+        interval=LOOP_WATCHDOG_INTERVAL,
+        threshold=LOOP_LAG_THRESHOLD_MS / 1000,
+        report_interval=LOOP_LAG_REPORT_INTERVAL,
+    )
+    watchdog.start()
+    if LOOP_DEBUG_DB:
+        watchdog.watch_engine(engine)
+    trace_exporter = TraceExporter(TRACE_EXPORT_PATH) if TRACE_EXPORT_PATH else None
+    dp = create_dispatcher(trace_exporter)
+    bot.session.middleware(TelegramRequestSpans())
+    await start_http_pool()
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT)
+    if SCHEDULER_ENABLED:
+        await start_scheduler()
+        start_prefetcher()
+    optimize_task = asyncio.create_task(run_periodic_optimize())
+
+    pool = None
+    if UPDATE_WORKERS:
+        pool = WorkerPool(UPDATE_WORKERS, WORKER_MAX_CONCURRENCY, allowed_updates=dp.resolve_used_update_types())
+        pool.start()
 
-    await dp.start_polling(bot)
+    try:
+        if UPDATES_MODE == "webhook":
+            await run_webhook(
+                pool or dp, bot,
+                url=WEBHOOK_URL,
+                host=WEBHOOK_HOST,
+                port=WEBHOOK_PORT,
+                path=WEBHOOK_PATH,
+                secret=WEBHOOK_SECRET,
+                max_concurrency=WEBHOOK_MAX_CONCURRENCY,
+                max_connections=WEBHOOK_MAX_CONNECTIONS,
+            )
+        else:
+            # getUpdates is refused while a webhook is registered, e.g. after running in webhook mode.
+            await bot.delete_webhook()
+            if pool is not None:
+                await run_polling_front(bot, pool)
+            else:
+                await dp.start_polling(bot)
+    finally:
+        if pool is not None:
+            await pool.stop()
+        optimize_task.cancel()
+        if SCHEDULER_ENABLED:
+            await stop_prefetcher()
+            await stop_scheduler()
+        # start_polling closes it on its own; the webhook and worker-pool fronts do not.
+        await bot.session.close()
+        await close_http_client()
+        await stop_metrics_server()
+        close_cache_store()
+        if trace_exporter is not None:
+            trace_exporter.close()
+        await watchdog.stop()
 
 
 if __name__ == "__main__":
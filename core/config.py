@@ -3,13 +3,86 @@ import os
 from aiogram.client.default import DefaultBotProperties
 from dotenv import load_dotenv
 from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
 
 load_dotenv()
 
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+# Alternative Bot API server, e.g. a local Bot API server or benchmarks/fake_servers.py.
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL')
+
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 100))
+HTTP_POOL_PER_HOST = int(os.getenv('HTTP_POOL_PER_HOST', 30))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 60))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', 300))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 10))
+
+SCHEDULER_FETCH_CONCURRENCY = int(os.getenv('SCHEDULER_FETCH_CONCURRENCY', 20))
+
+# Keep the lookahead below WEATHER_CACHE_TTL so prefetched data is still fresh when the slot fires.
+PREFETCH_LOOKAHEAD_MINUTES = int(os.getenv('PREFETCH_LOOKAHEAD_MINUTES', 3))
+PREFETCH_CONCURRENCY = int(os.getenv('PREFETCH_CONCURRENCY', 5))
+
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 25))
+TELEGRAM_PER_CHAT_RATE = float(os.getenv('TELEGRAM_PER_CHAT_RATE', 1))
+TELEGRAM_SEND_WORKERS = int(os.getenv('TELEGRAM_SEND_WORKERS', 30))
+TELEGRAM_SEND_MAX_RETRIES = int(os.getenv('TELEGRAM_SEND_MAX_RETRIES', 3))
+
+# Prometheus text metrics at http://METRICS_HOST:METRICS_PORT/metrics; 0 disables the endpoint.
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+
+# Updates slower than this are logged with a breakdown of where the time went.
+SLOW_UPDATE_MS = float(os.getenv('SLOW_UPDATE_MS', 1000))
+# Optional file receiving every update trace as a JSON line.
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH')
+
+# Event loop watchdog: sampling interval, lag above which the blocking stack is
+# logged, and how often lag percentiles are reported. LOOP_DEBUG_DB=1 also logs
+# synchronous database sessions opened on the loop thread.
+LOOP_WATCHDOG_INTERVAL = float(os.getenv('LOOP_WATCHDOG_INTERVAL', 0.1))
+LOOP_LAG_THRESHOLD_MS = float(os.getenv('LOOP_LAG_THRESHOLD_MS', 250))
+LOOP_LAG_REPORT_INTERVAL = float(os.getenv('LOOP_LAG_REPORT_INTERVAL', 300))
+LOOP_DEBUG_DB = os.getenv('LOOP_DEBUG_DB', '0').lower() in ('1', 'true', 'yes')
+
+# Telegram user IDs allowed to run the /profile and /memprofile admin commands.
+ADMIN_IDS = {int(user_id) for user_id in os.getenv('ADMIN_IDS', '').split(',') if user_id.strip()}
+PROFILE_DEFAULT_SECONDS = float(os.getenv('PROFILE_DEFAULT_SECONDS', 30))
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 300))
+
+# How updates arrive: 'polling' (getUpdates) or 'webhook'. In webhook mode WEBHOOK_URL is
+# the public HTTPS URL registered with Telegram; a TLS-terminating proxy forwards it to
+# WEBHOOK_HOST:WEBHOOK_PORT/WEBHOOK_PATH. WEBHOOK_URL and WEBHOOK_SECRET are required in
+# webhook mode; instances sharing one bot must share WEBHOOK_SECRET.
+UPDATES_MODE = os.getenv('UPDATES_MODE', 'polling').lower()
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_MAX_CONCURRENCY = int(os.getenv('WEBHOOK_MAX_CONCURRENCY', 100))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', 40))
+
+# Run the notification scheduler and prefetcher in this instance. Of several instances
+# sharing one bot and database, enable it in exactly one; it re-reads subscription
+# times every SCHEDULE_RESYNC_SECONDS (0: never) to pick up changes made by the others.
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', '1').lower() in ('1', 'true', 'yes')
+SCHEDULE_RESYNC_SECONDS = float(os.getenv('SCHEDULE_RESYNC_SECONDS', 60))
+
+# Number of worker processes handling updates; 0 handles them in this process. The
+# polling or webhook front routes updates to workers by chat ID. Worker N serves its
+# metrics on METRICS_PORT + 1 + N.
+UPDATE_WORKERS = int(os.getenv('UPDATE_WORKERS', 0))
+WORKER_MAX_CONCURRENCY = int(os.getenv('WORKER_MAX_CONCURRENCY', 100))
+
 bot = Bot(
     token=TELEGRAM_BOT_TOKEN,
+    session=AiohttpSession(api=TelegramAPIServer.from_base(TELEGRAM_API_URL)) if TELEGRAM_API_URL else None,
     default=DefaultBotProperties(parse_mode=ParseMode.HTML)
 )
@@ -1,10 +1,76 @@
-from sqlalchemy import create_engine
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import sessionmaker
 import os
 
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DB_PATH = os.path.join(BASE_DIR, "db.sqlite3")
+DB_PATH = os.getenv("DATABASE_PATH", os.path.join(BASE_DIR, "db.sqlite3"))
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# Applied to every new SQLite connection. WAL lets the scheduler read while
+# subscriptions are written; busy_timeout makes writers wait instead of failing
+# with "database is locked". A negative cache_size is in KiB.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_CACHE_SIZE = int(os.getenv("SQLITE_CACHE_SIZE", -16000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 128 * 1024 * 1024))
+SQLITE_OPTIMIZE_INTERVAL = int(os.getenv("SQLITE_OPTIMIZE_INTERVAL", 3600))
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size={SQLITE_CACHE_SIZE}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    finally:
+        cursor.close()
+
+
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+event.listen(engine, "connect", apply_sqlite_pragmas)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# All database work from async code runs on these threads so SQLite I/O and lock
+# waits never block the event loop.
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", 1))
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run `func(db, *args, **kwargs)` with a fresh session on the database thread.
+    The caller's context is carried over, so spans recorded there join the current trace.
+    """
+    def call():
+        with SessionLocal() as db:
+            return func(db, *args, **kwargs)
+
+    context = contextvars.copy_context()
+    with span(f"run_db.{func.__name__}"):
+        return await asyncio.get_running_loop().run_in_executor(_db_executor, context.run, call)
+
+
+def optimize_database(db):
+    db.execute(text("PRAGMA optimize"))
+
+
+async def run_periodic_optimize():
+    """Run `PRAGMA optimize` every SQLITE_OPTIMIZE_INTERVAL seconds so query plans follow the data."""
+    while True:
+        await asyncio.sleep(SQLITE_OPTIMIZE_INTERVAL)
+        try:
+            await run_db(optimize_database)
+        except Exception:
+            logger.exception("PRAGMA optimize failed")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, UniqueConstraint, false
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -9,6 +9,7 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True)
     telegram_id = Column(Integer, unique=True, index=True)
+    blocked = Column(Boolean, nullable=False, default=False, server_default=false())
 
 
 class SubscriptionType(Base):
@@ -25,6 +26,7 @@ class Subscription(Base):
     city = Column(String, nullable=False)
     type_id = Column(Integer, ForeignKey('subscription_types.id'), nullable=False)
     time = Column(String, nullable=False)
+    minute = Column(Integer, nullable=False, index=True)
 
     user = relationship('User', passive_deletes=True)
     subscription_type = relationship('SubscriptionType')
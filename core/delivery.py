@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import (
+    TelegramAPIError, TelegramRetryAfter, TelegramForbiddenError, TelegramNetworkError, TelegramServerError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at `rate` tokens per second, holding at most `capacity`.
+
+    `reserve()` always takes a token and returns how long the caller must wait
+    before using it, so concurrent callers are served in order without polling.
+    `delay()` returns how long until a token is available without taking one.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def delay(self) -> float:
+        self._refill(time.monotonic())
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+    def is_idle(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class DeliveryQueue:
+    """
+    Queue in front of `bot.send_message` that respects Telegram rate limits.
+
+    Messages are sent by a fixed pool of workers. A message whose recipient is
+    still within its own per-chat limit is parked, together with any later
+    messages to that chat, and put back on the queue once the chat is ready, so
+    workers never sleep on one chat while others are waiting. The global token
+    is taken right before each send, which paces sends to `global_rate` per
+    second. `TelegramRetryAfter` pauses every worker for the requested time;
+    network and server errors are retried with exponential backoff and jitter.
+    Recipients that blocked the bot (403) are reported through `on_blocked`.
+    """
+
+    def __init__(
+            self,
+            bot: Bot,
+            global_rate: float = 25,
+            per_chat_rate: float = 1,
+            workers: int = 30,
+            max_retries: int = 3,
+            on_blocked: Optional[Callable[[int], Awaitable[None]]] = None,
+    ):
+        self.bot = bot
+        # A small bucket (20 ms worth of sends, at least one) so a burst after an idle period barely
+        # adds to the steady rate within the same second, while sends are not paced one timer at a time.
+        self.global_bucket = TokenBucket(global_rate, max(1.0, global_rate / 50))
+        self.per_chat_rate = per_chat_rate
+        self.workers = workers
+        self.max_retries = max_retries
+        self.on_blocked = on_blocked
+        self.stats = {"delivered": 0, "failed": 0, "retried": 0, "blocked": 0, "retry_after": 0}
+        self._chat_buckets = {}
+        self._parked = {}
+        self._timers = {}
+        self._paused_until = 0.0
+        self._queue: Optional[asyncio.Queue] = None
+        self._global_lock: Optional[asyncio.Lock] = None
+        self._tasks = []
+
+    def submit(self, chat_id: int, text: str) -> asyncio.Future:
+        """Enqueue a message. The returned future resolves to True once delivered, False on failure."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((chat_id, text, future, False))
+        return future
+
+    async def close(self) -> None:
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._parked.clear()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    def _ensure_started(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._global_lock = asyncio.Lock()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    def _chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) > 10000:
+                self._chat_buckets = {
+                    cid: b for cid, b in self._chat_buckets.items() if not b.is_idle() or cid in self._parked
+                }
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate, 1)
+        return bucket
+
+    def _park(self, chat_id: int, text: str, future: asyncio.Future, released: bool) -> bool:
+        """
+        Hold the message back if its chat is not ready; returns False if it can be sent now.
+        Messages to a chat with parked messages queue up behind them, so a chat's messages keep their order.
+        """
+        parked = self._parked.get(chat_id)
+        if parked is not None and not released:
+            parked.append((text, future))
+            return True
+        wait = self._chat_bucket(chat_id).delay()
+        if wait <= 0:
+            return False
+        self._parked.setdefault(chat_id, deque()).appendleft((text, future))
+        self._release_later(chat_id, wait)
+        return True
+
+    def _release_later(self, chat_id: int, wait: float) -> None:
+        self._timers[chat_id] = asyncio.get_running_loop().call_later(wait, self._release, chat_id)
+
+    def _release(self, chat_id: int) -> None:
+        """Put the chat's oldest parked message back on the queue; it stays marked as parked until sent."""
+        self._timers.pop(chat_id, None)
+        parked = self._parked.get(chat_id)
+        if not parked:
+            self._parked.pop(chat_id, None)
+            return
+        text, future = parked.popleft()
+        self._queue.put_nowait((chat_id, text, future, True))
+
+    async def _worker(self) -> None:
+        while True:
+            chat_id, text, future, released = await self._queue.get()
+            try:
+                if self._park(chat_id, text, future, released):
+                    continue
+                try:
+                    delivered = await self._deliver(chat_id, text)
+                except Exception:
+                    logger.exception("Unexpected error while sending to %s", chat_id)
+                    delivered = False
+                if delivered:
+                    self.stats["delivered"] += 1
+                else:
+                    self.stats["failed"] += 1
+                if not future.done():
+                    future.set_result(delivered)
+                if released:
+                    # Let the next parked message through once the chat is ready again.
+                    self._release_later(chat_id, self._chat_bucket(chat_id).delay())
+            finally:
+                self._queue.task_done()
+
+    async def _wait_for_global_slot(self) -> None:
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        # One worker at a time waits for the next token and takes it when it actually sends, so
+        # sleeps that wake up late cannot bunch sends together above the rate.
+        async with self._global_lock:
+            wait = self.global_bucket.delay()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self.global_bucket.delay()
+            self.global_bucket.reserve()
+
+    async def _deliver(self, chat_id: int, text: str) -> bool:
+        bucket = self._chat_bucket(chat_id)
+        for attempt in range(self.max_retries + 1):
+            # The first attempt's chat slot was checked by _park(); retries are already sleeping anyway.
+            wait = bucket.reserve()
+            if attempt and wait > 0:
+                await asyncio.sleep(wait)
+            await self._wait_for_global_slot()
+            try:
+                await self.bot.send_message(chat_id, text)
+                return True
+            except TelegramRetryAfter as e:
+                self.stats["retry_after"] += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + e.retry_after)
+                delay = e.retry_after + random.uniform(0, 1)
+            except TelegramForbiddenError:
+                self.stats["blocked"] += 1
+                if self.on_blocked is not None:
+                    await self.on_blocked(chat_id)
+                return False
+            except (TelegramNetworkError, TelegramServerError) as e:
+                delay = min(30, 2 ** attempt) * random.uniform(0.5, 1.5)
+                logger.warning("Send to %s failed (%r), attempt %d", chat_id, e, attempt + 1)
+            except TelegramAPIError as e:
+                logger.warning("Send to %s rejected: %r", chat_id, e)
+                return False
+            if attempt < self.max_retries:
+                self.stats["retried"] += 1
+                await asyncio.sleep(delay)
+        return False
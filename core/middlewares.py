@@ -0,0 +1,106 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from utils.metrics import registry
+from utils.tracing import TraceExporter, current_trace, format_breakdown, span, start_trace
+
+logger = logging.getLogger(__name__)
+
+HANDLER_SECONDS = registry.histogram(
+    "bot_handler_seconds", "Time spent in each update handler", ["handler"]
+)
+HANDLER_ERRORS = registry.counter(
+    "bot_handler_errors_total", "Handler calls that raised", ["handler"]
+)
+UPDATE_SECONDS = registry.histogram(
+    "bot_update_seconds", "End-to-end processing time of each update, by the handler that took it", ["handler"]
+)
+SLOW_UPDATES = registry.counter(
+    "bot_slow_updates_total", "Updates slower than the slow-update threshold", ["handler"]
+)
+
+
+def _update_name(update: Update) -> str:
+    """Short, content-free name for an update: the command for commands, otherwise the event type."""
+    message = update.message
+    if message is not None and message.text and message.text.startswith("/"):
+        return message.text.split(maxsplit=1)[0].split("@", 1)[0]
+    return update.event_type
+
+
+class UpdateTracingMiddleware(BaseMiddleware):
+    """
+    Outer update middleware tracing every update end to end.
+
+    Spans recorded while the update is processed (OpenWeather requests, database
+    calls, formatting, transliteration, Bot API requests) are attached to its
+    trace. Updates slower than `slow_threshold` seconds are logged with their
+    span breakdown; every trace goes to `exporter` if one is given.
+    """
+
+    def __init__(self, slow_threshold: float, exporter: Optional[TraceExporter] = None):
+        self.slow_threshold = slow_threshold
+        self.exporter = exporter
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: Update,
+            data: Dict[str, Any],
+    ) -> Any:
+        trace = None
+        try:
+            with start_trace(_update_name(event), update_id=event.update_id) as trace:
+                return await handler(event, data)
+        finally:
+            if trace is not None:
+                self._finish(trace)
+
+    def _finish(self, trace) -> None:
+        handler = trace.attrs.get("handler", "unhandled")
+        UPDATE_SECONDS.observe(trace.duration, handler)
+        if trace.duration >= self.slow_threshold:
+            SLOW_UPDATES.inc(handler)
+            logger.warning(
+                "Slow update %s (%s, %s): %.1fms; %s",
+                trace.attrs["update_id"], trace.name, handler, trace.duration * 1000, format_breakdown(trace),
+            )
+        if self.exporter is not None:
+            self.exporter.export(trace)
+
+
+class TelegramRequestSpans(BaseRequestMiddleware):
+    """Bot session middleware recording each Bot API call as a span of the current trace."""
+
+    async def __call__(self, make_request: NextRequestMiddlewareType, bot: Bot, method: TelegramMethod):
+        with span(f"telegram.{type(method).__name__}"):
+            return await make_request(bot, method)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Inner middleware timing every handler call, labelled with the handler's name."""
+
+    async def __call__(
+            self,
+            handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+            event: TelegramObject,
+            data: Dict[str, Any],
+    ) -> Any:
+        name = data["handler"].callback.__name__
+        trace = current_trace()
+        if trace is not None:
+            trace.attrs["handler"] = name
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - started, name)
@@ -1,76 +1,271 @@
 import asyncio
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import logging
+import time
+from collections import defaultdict
+
 import datetime
-from core.config import bot, WEATHER_API_KEY
-from core.database.db_connector import SessionLocal
-from crud.subscription import get_subscriptions_by_time
+from core.config import (
+    bot, WEATHER_API_KEY, SCHEDULER_FETCH_CONCURRENCY, SCHEDULE_RESYNC_SECONDS, TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_PER_CHAT_RATE, TELEGRAM_SEND_WORKERS, TELEGRAM_SEND_MAX_RETRIES,
+)
+from core.delivery import DeliveryQueue
+from core.schedule_wheel import schedule_wheel, minute_to_time, MINUTES_PER_DAY
+from crud.async_subscription import get_due_notifications, get_subscription_minutes, mark_user_blocked
 from utils.weather_api import (
-    get_current_weather_full, get_city_coordinates, get_air_quality, get_forecast_json
+    get_location_snapshot, get_current_weather_batch, get_upstream_call_count,
 )
 from utils.format_message import (
     format_weather_message, format_hourly_message, format_details_message,
     format_sunrise_sunset_message, format_wind_message, format_air_quality_message
 )
+from utils.message_cache import rendered_messages
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# Slots missed while the loop was busy (e.g. a long run) are still delivered, up to this many minutes late.
+MAX_CATCHUP_MINUTES = 5
+
+_scheduler_task = None
+_resync_task = None
+_running_jobs = set()
+
+RUN_PHASE_SECONDS = registry.histogram(
+    "scheduler_run_phase_seconds", "Duration of each phase of a notification run", ["phase"]
+)
+RUN_LATENESS_SECONDS = registry.histogram(
+    "scheduler_run_lateness_seconds", "How long after its scheduled minute a notification run started"
+)
+RUN_DUE = registry.histogram(
+    "scheduler_run_due_notifications", "Notifications due per run",
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+NOTIFICATIONS = registry.counter(
+    "scheduler_notifications_total", "Scheduled notifications by outcome", ["outcome"]
+)
+
+
+async def mark_blocked(telegram_id: int):
+    logger.info("User %s blocked the bot, skipping their subscriptions", telegram_id)
+    await mark_user_blocked(telegram_id)
+
+
+delivery = DeliveryQueue(
+    bot,
+    global_rate=TELEGRAM_GLOBAL_RATE,
+    per_chat_rate=TELEGRAM_PER_CHAT_RATE,
+    workers=TELEGRAM_SEND_WORKERS,
+    max_retries=TELEGRAM_SEND_MAX_RETRIES,
+    on_blocked=mark_blocked,
+)
+
+
+def _collect_delivery_metrics():
+    yield "telegram_send_total", "counter", "Telegram send attempts by outcome", [
+        ({"outcome": outcome}, count) for outcome, count in delivery.stats.items()
+    ]
+
+
+registry.add_collector(_collect_delivery_metrics)
+
+
+def send_notification(telegram_id, message):
+    return delivery.submit(telegram_id, message)
+
+
+# Subscription types rendered from the current-weather payload.
+CURRENT_WEATHER_FORMATTERS = {
+    "weather": format_weather_message,
+    "details": format_details_message,
+    "sun": format_sunrise_sunset_message,
+    "wind": format_wind_message,
+}
+
+
+def data_kind(sub_type: str) -> str:
+    """Return which upstream payload a subscription type needs: 'current', 'forecast' or 'air'."""
+    if sub_type in CURRENT_WEATHER_FORMATTERS:
+        return "current"
+    return "forecast" if sub_type == "hourly" else sub_type
+
+
+def render_notification(city: str, sub_type: str, data):
+    if not data:
+        return None
+
+    if sub_type in CURRENT_WEATHER_FORMATTERS:
+        return CURRENT_WEATHER_FORMATTERS[sub_type](data)
+
+    if sub_type == "hourly":
+        return format_hourly_message(city, data)
+
+    if sub_type == "air" and data.get("list"):
+        return format_air_quality_message(city, data["list"][0])
+
+    return None
+
+
+async def build_notification(city: str, sub_type: str):
+    """
+    Fetch the section of the city's location snapshot a subscription type needs and render its message.
+    Each message is rendered once per payload and shared with the command handlers.
+    """
+    section = data_kind(sub_type)
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, (section,))
+    if snapshot is None:
+        return None
+    return rendered_messages.render(
+        sub_type, city, snapshot.version(section), render_notification, city, sub_type, getattr(snapshot, section),
+        section=section,
+    )
+
+
+async def _build_group_messages(groups):
+    semaphore = asyncio.Semaphore(SCHEDULER_FETCH_CONCURRENCY)
+
+    async def build(key):
+        city, sub_type = key
+        async with semaphore:
+            try:
+                return key, await build_notification(city, sub_type)
+            except Exception:
+                logger.exception("Failed to build %s notification for %s", sub_type, city)
+                return key, None
+
+    return dict(await asyncio.gather(*(build(key) for key in groups)))
+
+
+def _current_minute() -> int:
+    now = datetime.datetime.now()
+    return now.hour * 60 + now.minute
+
+
+def _lateness(minute: int) -> float:
+    """Seconds since the most recent occurrence of `minute` (local time)."""
+    now = datetime.datetime.now()
+    scheduled = now.replace(hour=minute // 60, minute=minute % 60, second=0, microsecond=0)
+    if scheduled > now:
+        scheduled -= datetime.timedelta(days=1)
+    return (now - scheduled).total_seconds()
+
+
+async def check_and_send_notifications(minute: int = None):
+    started = time.perf_counter()
+    if minute is None:
+        minute = _current_minute()
+    current_time = minute_to_time(minute)
+    lateness = _lateness(minute)
+
+    due_ids = schedule_wheel.due(minute)
+    if not due_ids:
+        return
+
+    groups = defaultdict(list)
+    rows = await get_due_notifications(due_ids)
+    for telegram_id, city, sub_type in rows:
+        groups[(city, sub_type)].append(telegram_id)
+    loaded = time.perf_counter()
+
+    upstream_before = get_upstream_call_count()
+    current_cities = {city for city, sub_type in groups if sub_type in CURRENT_WEATHER_FORMATTERS}
+    if current_cities:
+        await get_current_weather_batch(current_cities, WEATHER_API_KEY)
+    messages = await _build_group_messages(groups)
+    upstream_calls = get_upstream_call_count() - upstream_before
+    fetched = time.perf_counter()
+
+    tasks = [
+        send_notification(telegram_id, messages[key])
+        for key, telegram_ids in groups.items() if messages.get(key)
+        for telegram_id in telegram_ids
+    ]
+    results = await asyncio.gather(*tasks) if tasks else []
+    sent = time.perf_counter()
 
-scheduler = AsyncIOScheduler()
+    if groups:
+        due = sum(len(ids) for ids in groups.values())
+        delivered = sum(results)
+        RUN_LATENESS_SECONDS.observe(lateness)
+        RUN_DUE.observe(due)
+        RUN_PHASE_SECONDS.observe(loaded - started, "load")
+        RUN_PHASE_SECONDS.observe(fetched - loaded, "fetch")
+        RUN_PHASE_SECONDS.observe(sent - fetched, "send")
+        NOTIFICATIONS.inc("delivered", amount=delivered)
+        NOTIFICATIONS.inc("failed", amount=len(results) - delivered)
+        NOTIFICATIONS.inc("not_rendered", amount=due - len(results))
+        logger.info(
+            "Notifications %s: %d due, %d groups, %d upstream calls, %d delivered, %d failed; "
+            "load %.3fs, fetch+render %.3fs, send %.3fs",
+            current_time, due, len(groups), upstream_calls,
+            delivered, len(results) - delivered,
+            loaded - started, fetched - loaded, sent - fetched,
+        )
 
 
-async def send_notification(telegram_id, message):
-    if message:
-        await bot.send_message(telegram_id, message)
+def _run_slot(minute: int) -> None:
+    job = asyncio.create_task(check_and_send_notifications(minute))
+    _running_jobs.add(job)
 
+    def _done(done):
+        _running_jobs.discard(done)
+        if not done.cancelled() and done.exception() is not None:
+            logger.error("Notification run for %s failed", minute_to_time(minute), exc_info=done.exception())
 
-async def check_and_send_notifications():
-    current_time = datetime.datetime.now().strftime('%H:%M')
-    with SessionLocal() as db:
-        subscriptions = get_subscriptions_by_time(db, current_time)
-        tasks = []
-        for subscription in subscriptions:
-            sub_type = getattr(getattr(subscription, "subscription_type", None), "code", None)
-            if not sub_type:
-                continue
+    job.add_done_callback(_done)
 
-            msg = None
-            city = subscription.city
 
-            if sub_type == "weather":
-                weather = await get_current_weather_full(city, WEATHER_API_KEY)
-                if weather:
-                    msg = format_weather_message(weather)
+async def _scheduler_loop():
+    # The slot of the minute we start in is left alone: the previous process may already have sent it,
+    # and running it again after a restart would notify everyone twice. Only slots starting later run.
+    last_minute = _current_minute()
 
-            elif sub_type == "hourly":
-                forecast = await get_forecast_json(city, WEATHER_API_KEY)
-                if forecast and "list" in forecast:
-                    msg = format_hourly_message(city, forecast["list"])
+    while True:
+        schedule_wheel.changed.clear()
+        now = datetime.datetime.now()
+        current = now.hour * 60 + now.minute
+        missed = (current - last_minute) % MINUTES_PER_DAY
+        for step in range(max(1, missed - MAX_CATCHUP_MINUTES + 1), missed + 1):
+            minute = (last_minute + step) % MINUTES_PER_DAY
+            if schedule_wheel.due(minute):
+                _run_slot(minute)
+        last_minute = current
 
-            elif sub_type == "details":
-                weather = await get_current_weather_full(city, WEATHER_API_KEY)
-                if weather:
-                    msg = format_details_message(weather)
+        step = schedule_wheel.next_due(current)
+        if step is None:
+            wait = None
+        else:
+            wake_at = now.replace(second=0, microsecond=0) + datetime.timedelta(minutes=step)
+            wait = (wake_at - now).total_seconds()
 
-            elif sub_type == "sun":
-                weather = await get_current_weather_full(city, WEATHER_API_KEY)
-                if weather:
-                    msg = format_sunrise_sunset_message(weather)
+        try:
+            await asyncio.wait_for(schedule_wheel.changed.wait(), wait)
+        except asyncio.TimeoutError:
+            pass
 
-            elif sub_type == "wind":
-                weather = await get_current_weather_full(city, WEATHER_API_KEY)
-                if weather:
-                    msg = format_wind_message(weather)
 
-            elif sub_type == "air":
-                lat, lon = await get_city_coordinates(city, WEATHER_API_KEY)
-                air = await get_air_quality(lat, lon, WEATHER_API_KEY)
-                if air and "list" in air and air["list"]:
-                    msg = format_air_quality_message(city, air["list"][0])
+async def _resync_loop():
+    """Reload the wheel from the database, picking up subscriptions changed by other instances."""
+    while True:
+        await asyncio.sleep(SCHEDULE_RESYNC_SECONDS)
+        try:
+            schedule_wheel.load(await get_subscription_minutes())
+        except Exception:
+            logger.exception("Reloading the schedule wheel failed")
 
-            if msg:
-                tasks.append(send_notification(subscription.user.telegram_id, msg))
 
-        if tasks:
-            await asyncio.gather(*tasks)
+async def start_scheduler():
+    global _scheduler_task, _resync_task
+    schedule_wheel.bind_loop()
+    schedule_wheel.load(await get_subscription_minutes())
+    logger.info("Loaded %d subscriptions into the schedule wheel", len(schedule_wheel))
+    _scheduler_task = asyncio.create_task(_scheduler_loop())
+    if SCHEDULE_RESYNC_SECONDS > 0:
+        _resync_task = asyncio.create_task(_resync_loop())
 
 
-def start_scheduler():
-    scheduler.add_job(check_and_send_notifications, 'cron', minute='*')
-    scheduler.start()
+async def stop_scheduler():
+    for task in (_scheduler_task, _resync_task):
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    await delivery.close()
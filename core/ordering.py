@@ -0,0 +1,66 @@
+import asyncio
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def route_key(update: dict) -> int:
+    """Chat ID of a raw update (the user ID if it has no chat); updates are ordered and routed per key."""
+    for value in update.values():
+        if not isinstance(value, dict):
+            continue
+        chat = value.get("chat") or (value.get("message") or {}).get("chat")
+        if chat:
+            return chat["id"]
+        user = value.get("from") or value.get("user")
+        if user:
+            return user["id"]
+    return update.get("update_id", 0)
+
+
+class OrderedFeeder:
+    """
+    Feeds updates to a dispatcher concurrently across chats, in arrival order
+    within a chat, so a chat's FSM steps never overtake each other. At most
+    `max_concurrency` updates are processed at once; `on_done(update_id)` is
+    called after each one, whether or not its handlers raised.
+    """
+
+    def __init__(self, dp, bot, max_concurrency: int, on_done: Callable[[int], None]):
+        self.dp = dp
+        self.bot = bot
+        self.on_done = on_done
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._last = {}
+        self._tasks = set()
+
+    def submit(self, update: dict) -> None:
+        key = route_key(update)
+        task = asyncio.create_task(self._process(update, self._last.get(key)))
+        self._last[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda done: self._finished(key, done))
+
+    async def _process(self, update: dict, previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            async with self._slots:
+                await self.dp.feed_raw_update(self.bot, update)
+        except Exception:
+            logger.exception("Failed to process update %s", update.get("update_id"))
+        finally:
+            self.on_done(update.get("update_id"))
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _finished(self, key: int, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if self._last.get(key) is task:
+            del self._last[key]
+
+    async def wait(self) -> None:
+        if self._tasks:
+            await asyncio.wait(self._tasks)
@@ -0,0 +1,100 @@
+import asyncio
+import datetime
+import logging
+import time
+
+from core.config import WEATHER_API_KEY, PREFETCH_LOOKAHEAD_MINUTES, PREFETCH_CONCURRENCY
+from core.notification_scheduler import data_kind
+from core.schedule_wheel import schedule_wheel, minute_to_time, MINUTES_PER_DAY
+from crud.async_subscription import get_due_notifications
+from utils.weather_api import get_current_weather_batch, get_location_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Seconds after the minute boundary at which a prefetch round starts, so it does
+# not compete with the notification run for the slot that just fired.
+PREFETCH_OFFSET = 5
+
+_prefetch_task = None
+
+
+async def prefetch_slot(minute: int, spread: float) -> int:
+    """
+    Warm the weather caches for every subscription due at `minute`.
+
+    Current weather for all cities is fetched in batches first; then the cities
+    with forecast or air-quality subscriptions get those sections fetched, with
+    request start times spread evenly over `spread` seconds to avoid bursts
+    against OpenWeather. Returns the number of cities warmed.
+    """
+    rows = await get_due_notifications(schedule_wheel.due(minute))
+    sections = {}
+    for _, city, sub_type in rows:
+        sections.setdefault(city, set()).add(data_kind(sub_type))
+    cities = sorted(sections)
+    if not cities:
+        return 0
+
+    started = time.perf_counter()
+    await get_current_weather_batch(cities, WEATHER_API_KEY)
+
+    # Current weather is warm now; only the other sections are left to fetch.
+    remaining = [(city, tuple(sections[city] - {"current"})) for city in cities if sections[city] - {"current"}]
+    semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+    interval = spread / len(remaining) if remaining else 0
+
+    async def fetch(index, city, needed):
+        await asyncio.sleep(index * interval)
+        async with semaphore:
+            try:
+                await get_location_snapshot(city, WEATHER_API_KEY, needed)
+            except Exception:
+                logger.exception("Prefetch for %s failed", city)
+
+    await asyncio.gather(*(fetch(index, city, needed) for index, (city, needed) in enumerate(remaining)))
+    logger.info(
+        "Prefetched %d cities for %s in %.3fs",
+        len(cities), minute_to_time(minute), time.perf_counter() - started,
+    )
+    return len(cities)
+
+
+async def _prefetch_loop():
+    now = datetime.datetime.now()
+    current = now.hour * 60 + now.minute
+    for step in range(1, PREFETCH_LOOKAHEAD_MINUTES):
+        minute = (current + step) % MINUTES_PER_DAY
+        try:
+            await prefetch_slot(minute, spread=0)
+        except Exception:
+            logger.exception("Prefetch for %s failed", minute_to_time(minute))
+
+    while True:
+        now = datetime.datetime.now()
+        current = now.hour * 60 + now.minute
+        target = (current + PREFETCH_LOOKAHEAD_MINUTES) % MINUTES_PER_DAY
+        if schedule_wheel.due(target):
+            try:
+                await prefetch_slot(target, spread=60 - PREFETCH_OFFSET * 2)
+            except Exception:
+                logger.exception("Prefetch for %s failed", minute_to_time(target))
+
+        wake_at = now.replace(second=PREFETCH_OFFSET, microsecond=0) + datetime.timedelta(minutes=1)
+        await asyncio.sleep(max(0.0, (wake_at - datetime.datetime.now()).total_seconds()))
+
+
+def start_prefetcher():
+    """
+    Start warming data for subscriptions due PREFETCH_LOOKAHEAD_MINUTES ahead,
+    so that when a slot fires the scheduler only renders and sends.
+    """
+    global _prefetch_task
+    if PREFETCH_LOOKAHEAD_MINUTES <= 0:
+        return
+    _prefetch_task = asyncio.create_task(_prefetch_loop())
+
+
+async def stop_prefetcher():
+    if _prefetch_task is not None:
+        _prefetch_task.cancel()
+        await asyncio.gather(_prefetch_task, return_exceptions=True)
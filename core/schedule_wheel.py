@@ -0,0 +1,101 @@
+import asyncio
+import threading
+from typing import Callable, Iterable, Optional, Set, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def time_to_minute(time: str) -> int:
+    """Convert an 'HH:MM' string to minutes since midnight."""
+    hours, minutes = time.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def minute_to_time(minute: int) -> str:
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+class ScheduleWheel:
+    """
+    1440-slot timing wheel of subscription IDs, one slot per minute of the day.
+
+    Due subscriptions for a minute are read in O(1), and `next_due()` finds the
+    next non-empty slot so the scheduler can sleep until something is due.
+    `changed` is set whenever a subscription is added, so a sleeping scheduler
+    can recompute its wake-up time. The wheel may be updated from the database
+    thread; call `bind_loop()` from the event loop so `changed` is set safely.
+    If set, `listener(sub_id, minute)` is called after every `add()`, and with
+    minute None after every `remove()`; update workers use it to forward changes
+    to the scheduler's wheel in the front process.
+    """
+
+    def __init__(self):
+        self.slots = [set() for _ in range(MINUTES_PER_DAY)]
+        self._minute_by_id = {}
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.changed = asyncio.Event()
+        self.listener: Optional[Callable[[int, Optional[int]], None]] = None
+
+    def bind_loop(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    def _notify(self) -> None:
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            self.changed.set()
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self.changed.set()
+        else:
+            loop.call_soon_threadsafe(self.changed.set)
+
+    def __len__(self) -> int:
+        return len(self._minute_by_id)
+
+    def load(self, rows: Iterable[Tuple[int, int]]) -> None:
+        with self._lock:
+            for slot in self.slots:
+                slot.clear()
+            self._minute_by_id.clear()
+            for sub_id, minute in rows:
+                self.slots[minute].add(sub_id)
+                self._minute_by_id[sub_id] = minute
+        self._notify()
+
+    def add(self, sub_id: int, minute: int) -> None:
+        with self._lock:
+            old = self._minute_by_id.get(sub_id)
+            if old is not None:
+                self.slots[old].discard(sub_id)
+            self.slots[minute].add(sub_id)
+            self._minute_by_id[sub_id] = minute
+        self._notify()
+        if self.listener is not None:
+            self.listener(sub_id, minute)
+
+    def remove(self, sub_id: int) -> None:
+        with self._lock:
+            minute = self._minute_by_id.pop(sub_id, None)
+            if minute is not None:
+                self.slots[minute].discard(sub_id)
+        if self.listener is not None:
+            self.listener(sub_id, None)
+
+    def due(self, minute: int) -> Set[int]:
+        with self._lock:
+            return set(self.slots[minute])
+
+    def next_due(self, after: int) -> Optional[int]:
+        """Return how many minutes after `after` the next non-empty slot is (1..1440), or None."""
+        for step in range(1, MINUTES_PER_DAY + 1):
+            if self.slots[(after + step) % MINUTES_PER_DAY]:
+                return step
+        return None
+
+
+schedule_wheel = ScheduleWheel()
@@ -0,0 +1,136 @@
+import asyncio
+import contextlib
+import hmac
+import logging
+import signal
+from typing import Optional
+
+from aiogram import Bot, Dispatcher
+from aiohttp import web
+
+from core.ordering import OrderedFeeder
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+WEBHOOK_REQUESTS = registry.counter("webhook_requests_total", "Webhook requests by response status", ["status"])
+WEBHOOK_IN_FLIGHT = registry.gauge("webhook_updates_in_flight", "Webhook updates being processed")
+
+
+class WebhookServer:
+    """
+    aiohttp app receiving updates from Telegram's webhook and feeding them to
+    the dispatcher, or to anything else with a `feed_raw_update(bot, update)`
+    coroutine such as core.workers.WorkerPool.
+
+    Requests without the expected secret token header are rejected with 401;
+    the secret is required, so the endpoint never accepts anonymous updates.
+    Each accepted update is answered right away and processed in a task, after
+    the previous update from the same chat, so Telegram's parallel connections
+    cannot reorder a chat's dialog steps. At most `max_concurrency` updates are
+    accepted and not yet processed. Past that, the request waits for a free slot
+    before it is answered, so Telegram slows down instead of the process piling
+    up tasks.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, secret: str, path: str = "/webhook", max_concurrency: int = 100):
+        if not secret:
+            raise ValueError("a webhook secret is required")
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret.encode()
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._feeder = OrderedFeeder(dp, bot, max_concurrency, self._done)
+        self._in_flight = 0
+        self._runner = None
+        self.app = web.Application()
+        self.app.router.add_post(path, self._handle)
+
+    async def start(self, host: str = "0.0.0.0", port: int = 8080) -> str:
+        """Start serving and return the local webhook URL; port 0 picks a free port."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        url = f"http://{bound_host}:{bound_port}{self.path}"
+        logger.info("Receiving webhook updates at %s", url)
+        return url
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Stop accepting requests, then wait up to `timeout` seconds for updates in progress."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        try:
+            await asyncio.wait_for(self._feeder.wait(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Webhook updates still in progress after %gs", timeout)
+
+    def _authorized(self, request: web.Request) -> bool:
+        return hmac.compare_digest(request.headers.get(SECRET_HEADER, "").encode(), self.secret)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        if not self._authorized(request):
+            WEBHOOK_REQUESTS.inc(401)
+            return web.Response(status=401)
+        try:
+            update = await request.json()
+        except ValueError:
+            WEBHOOK_REQUESTS.inc(400)
+            return web.Response(status=400)
+
+        await self._slots.acquire()
+        self._feeder.submit(update)
+        self._in_flight += 1
+        WEBHOOK_IN_FLIGHT.set(self._in_flight)
+        WEBHOOK_REQUESTS.inc(200)
+        return web.Response()
+
+    def _done(self, update_id: int) -> None:
+        self._slots.release()
+        self._in_flight -= 1
+        WEBHOOK_IN_FLIGHT.set(self._in_flight)
+
+
+async def wait_for_stop_signal() -> None:
+    """Return once the process receives SIGINT or SIGTERM."""
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stopped.set)
+    try:
+        await stopped.wait()
+    finally:
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.remove_signal_handler(sig)
+
+
+def check_webhook_settings(url: Optional[str], secret: Optional[str]) -> None:
+    """Raise ValueError unless webhook mode has a public URL and a secret token to check requests against."""
+    missing = [name for name, value in (("WEBHOOK_URL", url), ("WEBHOOK_SECRET", secret)) if not value]
+    if missing:
+        raise ValueError(f"UPDATES_MODE=webhook requires {' and '.join(missing)}")
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, url: str, host: str, port: int, path: str,
+                      secret: str, max_concurrency: int, max_connections: int) -> None:
+    """Register `url` with Telegram and serve updates until SIGINT/SIGTERM."""
+    check_webhook_settings(url, secret)
+    server = WebhookServer(dp, bot, secret, path, max_concurrency)
+    await server.start(host, port)
+    await bot.set_webhook(
+        url,
+        secret_token=secret,
+        max_connections=max_connections,
+        allowed_updates=dp.resolve_used_update_types(),
+    )
+
+    try:
+        await wait_for_stop_signal()
+    finally:
+        await server.stop()
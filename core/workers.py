@@ -0,0 +1,247 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import signal
+import threading
+import time
+from typing import Callable, Optional
+
+import aiohttp
+
+from core.ordering import OrderedFeeder, route_key
+from core.schedule_wheel import schedule_wheel
+from core.webhook import wait_for_stop_signal
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+ROUTED = registry.counter("worker_updates_routed_total", "Updates sent to each worker process", ["worker"])
+PENDING = registry.gauge("worker_updates_pending", "Updates sent to a worker and not processed yet", ["worker"])
+RESTARTS = registry.counter("worker_restarts_total", "Worker processes restarted after exiting", ["worker"])
+
+SUPERVISE_INTERVAL = 5
+
+
+class WorkerPool:
+    """
+    Spreads update handling over `workers` processes.
+
+    The front process (poller or webhook server) hands raw updates to `feed()`,
+    which routes each one by chat ID, so a chat's updates, and its FSM state,
+    always live in the same worker. Every worker is a spawned process with its
+    own Dispatcher, bot session, HTTP pool and database engine. It processes up
+    to `max_concurrency` updates at once, in arrival order within a chat, and
+    acknowledges each one. Acknowledgements drive the pending gauges, `drain()`
+    and the optional `on_processed(update_id)` callback. Subscriptions added or
+    removed in a worker are sent back on the same queue and applied to this
+    process's schedule wheel, which the scheduler reads. A worker that exits is
+    restarted and picks up the updates still queued for it.
+    """
+
+    def __init__(self, workers: int, max_concurrency: int = 100, allowed_updates: Optional[list] = None,
+                 on_processed: Optional[Callable[[int], None]] = None):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.allowed_updates = allowed_updates
+        self.on_processed = on_processed
+        self._context = multiprocessing.get_context("spawn")
+        self._queues = []
+        self._processes = []
+        self._acks = None
+        self._pending = [0] * workers
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._reader: Optional[threading.Thread] = None
+        self._supervisor: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._acks = self._context.Queue()
+        self._queues = [self._context.Queue() for _ in range(self.workers)]
+        self._processes = [self._spawn(index) for index in range(self.workers)]
+        self._reader = threading.Thread(
+            target=self._read_acks, args=(asyncio.get_running_loop(),), name="worker-acks", daemon=True
+        )
+        self._reader.start()
+        self._supervisor = asyncio.create_task(self._supervise())
+        logger.info("Started %d update workers", self.workers)
+
+    def _spawn(self, index: int):
+        process = self._context.Process(
+            target=_run_worker,
+            args=(index, self._queues[index], self._acks, self.max_concurrency),
+            name=f"update-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def feed(self, update: dict) -> None:
+        index = route_key(update) % self.workers
+        self._queues[index].put(update)
+        self._pending[index] += 1
+        self._idle.clear()
+        ROUTED.inc(index)
+        PENDING.set(self._pending[index], index)
+
+    async def feed_raw_update(self, bot, update: dict) -> None:
+        """Dispatcher-compatible entry point, so WebhookServer can feed the pool."""
+        self.feed(update)
+
+    def resolve_used_update_types(self) -> Optional[list]:
+        return self.allowed_updates
+
+    async def drain(self) -> None:
+        """Wait until every update fed so far has been processed."""
+        await self._idle.wait()
+
+    def _read_acks(self, loop: asyncio.AbstractEventLoop) -> None:
+        while True:
+            message = self._acks.get()
+            if message is None:
+                return
+            kind, *args = message
+            if kind == "processed":
+                loop.call_soon_threadsafe(self._processed, *args)
+            else:
+                loop.call_soon_threadsafe(self._schedule_changed, *args)
+
+    @staticmethod
+    def _schedule_changed(sub_id: int, minute: Optional[int]) -> None:
+        if minute is None:
+            schedule_wheel.remove(sub_id)
+        else:
+            schedule_wheel.add(sub_id, minute)
+
+    def _processed(self, index: int, update_id: int) -> None:
+        self._pending[index] = max(self._pending[index] - 1, 0)
+        PENDING.set(self._pending[index], index)
+        if self.on_processed is not None:
+            self.on_processed(update_id)
+        if not any(self._pending):
+            self._idle.set()
+
+    async def _supervise(self) -> None:
+        while True:
+            await asyncio.sleep(SUPERVISE_INTERVAL)
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                logger.error("Update worker %d exited with code %s, restarting", index, process.exitcode)
+                RESTARTS.inc(index)
+                # Updates it was processing are lost; the ones still queued go to the new process.
+                self._pending[index] = 0
+                PENDING.set(0, index)
+                if not any(self._pending):
+                    self._idle.set()
+                self._processes[index] = self._spawn(index)
+
+    async def stop(self, timeout: float = 30) -> None:
+        """Let workers finish what is queued, waiting up to `timeout` seconds before terminating them."""
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+        for queue in self._queues:
+            queue.put(None)
+        await asyncio.to_thread(self._join, timeout)
+        if self._reader is not None:
+            self._acks.put(None)
+            self._reader.join()
+
+    def _join(self, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        for index, process in enumerate(self._processes):
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("Update worker %d did not stop in time, terminating", index)
+                process.terminate()
+                process.join()
+
+
+def _run_worker(index: int, queue, acks, max_concurrency: int) -> None:
+    # Ctrl+C reaches the whole process group; the front process stops workers through their queue.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_serve_worker(index, queue, acks, max_concurrency))
+
+
+async def _serve_worker(index: int, queue, acks, max_concurrency: int) -> None:
+    # Imported in the worker: every process builds its own bot, dispatcher, HTTP pool and engine.
+    from core.bot import create_dispatcher, start_http_pool
+    from core.config import bot, METRICS_HOST, METRICS_PORT, TRACE_EXPORT_PATH
+    from core.database.db_connector import engine
+    from core.middlewares import TelegramRequestSpans
+    from utils.http_client import close_http_client
+    from utils.metrics import start_metrics_server, stop_metrics_server
+    from utils.tracing import TraceExporter
+
+    trace_exporter = TraceExporter(f"{TRACE_EXPORT_PATH}.worker{index}") if TRACE_EXPORT_PATH else None
+    dp = create_dispatcher(trace_exporter)
+    bot.session.middleware(TelegramRequestSpans())
+    await start_http_pool()
+    if METRICS_PORT:
+        await start_metrics_server(METRICS_HOST, METRICS_PORT + 1 + index)
+
+    feeder = OrderedFeeder(dp, bot, max_concurrency, lambda update_id: acks.put(("processed", index, update_id)))
+    # The scheduler runs in the front process; this worker's wheel is never read.
+    schedule_wheel.listener = lambda sub_id, minute: acks.put(("schedule", sub_id, minute))
+    loop = asyncio.get_running_loop()
+    stopped = asyncio.Event()
+
+    def read_updates():
+        while True:
+            update = queue.get()
+            if update is None:
+                loop.call_soon_threadsafe(stopped.set)
+                return
+            loop.call_soon_threadsafe(feeder.submit, update)
+
+    threading.Thread(target=read_updates, name="worker-updates", daemon=True).start()
+    try:
+        await stopped.wait()
+        await feeder.wait()
+    finally:
+        await close_http_client()
+        await stop_metrics_server()
+        await bot.session.close()
+        if trace_exporter is not None:
+            trace_exporter.close()
+        engine.dispose()
+
+
+async def poll_updates(bot, pool: WorkerPool, timeout: int = 30) -> None:
+    """
+    Long-poll getUpdates and feed the raw updates to `pool`. The front process
+    only decodes the JSON; parsing into aiogram objects happens in the workers.
+    """
+    url = bot.session.api.api_url(token=bot.token, method="getUpdates")
+    offset = None
+    async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=timeout + 10)) as session:
+        while True:
+            params = {"timeout": str(timeout)}
+            if pool.allowed_updates is not None:
+                params["allowed_updates"] = json.dumps(pool.allowed_updates)
+            if offset is not None:
+                params["offset"] = str(offset)
+            try:
+                async with session.post(url, data=params) as response:
+                    payload = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                logger.warning("getUpdates failed: %s", e)
+                await asyncio.sleep(1)
+                continue
+            if not payload.get("ok"):
+                logger.warning("getUpdates failed: %s", payload.get("description"))
+                await asyncio.sleep((payload.get("parameters") or {}).get("retry_after", 1))
+                continue
+            for update in payload["result"]:
+                pool.feed(update)
+                offset = update["update_id"] + 1
+
+
+async def run_polling_front(bot, pool: WorkerPool) -> None:
+    """Poll for updates on behalf of `pool` until SIGINT/SIGTERM."""
+    poller = asyncio.create_task(poll_updates(bot, pool))
+    try:
+        await wait_for_stop_signal()
+    finally:
+        poller.cancel()
+        await asyncio.gather(poller, return_exceptions=True)
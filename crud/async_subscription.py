@@ -0,0 +1,38 @@
+from sqlalchemy.orm import Session
+
+from core.database.db_connector import run_db
+from crud import subscription
+
+
+def _add_subscriptions(db: Session, telegram_id: int, city: str, info_type_code: str, times: list):
+    for time in times:
+        subscription.add_subscription(db, telegram_id, city, info_type_code, time)
+
+
+async def add_subscriptions(telegram_id: int, city: str, info_type_code: str, times: list):
+    await run_db(_add_subscriptions, telegram_id, city, info_type_code, times)
+
+
+async def remove_subscription(
+        telegram_id: int,
+        city: str = None,
+        info_type_code: str = None,
+        time: str = None
+):
+    await run_db(subscription.remove_subscription, telegram_id, city, info_type_code, time)
+
+
+async def get_user_subscriptions(telegram_id: int):
+    return await run_db(subscription.get_user_subscriptions, telegram_id)
+
+
+async def get_due_notifications(ids):
+    return await run_db(subscription.get_due_notifications, ids)
+
+
+async def get_subscription_minutes():
+    return await run_db(subscription.get_subscription_minutes)
+
+
+async def mark_user_blocked(telegram_id: int):
+    await run_db(subscription.mark_user_blocked, telegram_id)
@@ -1,8 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 
 from core.database.models import User, Subscription, SubscriptionType
+from core.schedule_wheel import schedule_wheel, time_to_minute
+from utils.tracing import traced
 
 
+@traced("crud.get_or_create_user")
 def get_or_create_user(db: Session, telegram_id: int):
     user = db.query(User).filter_by(telegram_id=telegram_id).first()
     if not user:
@@ -13,10 +16,12 @@ def get_or_create_user(db: Session, telegram_id: int):
     return user
 
 
+@traced("crud.get_subscription_type")
 def get_subscription_type(db: Session, code: str):
     return db.query(SubscriptionType).filter_by(code=code).first()
 
 
+@traced("crud.add_subscription")
 def add_subscription(
         db: Session,
         telegram_id: int,
@@ -26,6 +31,8 @@ def add_subscription(
 ):
     city = city.strip().lower()
     user = get_or_create_user(db, telegram_id)
+    if user.blocked:
+        user.blocked = False
     sub_type = get_subscription_type(db, info_type_code)
     if not sub_type:
         raise ValueError("Unknown subscription type")
@@ -40,16 +47,20 @@ def add_subscription(
             user_id=user.id,
             city=city,
             type_id=sub_type.id,
-            time=time
+            time=time,
+            minute=time_to_minute(time)
         )
         db.add(sub)
         db.commit()
     else:
         sub.time = time
+        sub.minute = time_to_minute(time)
         db.commit()
+    schedule_wheel.add(sub.id, sub.minute)
     return sub
 
 
+@traced("crud.remove_subscription")
 def remove_subscription(
         db: Session,
         telegram_id: int,
@@ -69,11 +80,16 @@ def remove_subscription(
             q = q.filter(Subscription.type_id == sub_type.id)
     if time:
         q = q.filter(Subscription.time == time)
+    removed = []
     for sub in q:
+        removed.append(sub.id)
         db.delete(sub)
     db.commit()
+    for sub_id in removed:
+        schedule_wheel.remove(sub_id)
 
 
+@traced("crud.get_user_subscriptions")
 def get_user_subscriptions(db: Session, telegram_id: int):
     user = db.query(User).filter_by(telegram_id=telegram_id).first()
     if not user:
@@ -82,9 +98,47 @@ def get_user_subscriptions(db: Session, telegram_id: int):
         db.query(Subscription)
         .filter(Subscription.user_id == user.id)
         .join(Subscription.subscription_type)
+        .options(contains_eager(Subscription.subscription_type))
         .all()
     )
 
 
+@traced("crud.get_subscriptions_by_time")
 def get_subscriptions_by_time(db: Session, time: str):
-    return db.query(Subscription).filter(Subscription.time == time).all()
+    return (
+        db.query(Subscription)
+        .join(Subscription.user)
+        .filter(Subscription.minute == time_to_minute(time), User.blocked.is_(False))
+        .all()
+    )
+
+
+@traced("crud.get_due_notifications")
+def get_due_notifications(db: Session, ids):
+    """
+    Return (telegram_id, city, type_code) rows for the given subscription IDs,
+    skipping users that blocked the bot. One joined query, no ORM objects.
+    """
+    if not ids:
+        return []
+    return (
+        db.query(User.telegram_id, Subscription.city, SubscriptionType.code)
+        .select_from(Subscription)
+        .join(User, Subscription.user_id == User.id)
+        .join(SubscriptionType, Subscription.type_id == SubscriptionType.id)
+        .filter(Subscription.id.in_(ids), User.blocked.is_(False))
+        .all()
+    )
+
+
+@traced("crud.get_subscription_minutes")
+def get_subscription_minutes(db: Session):
+    return db.query(Subscription.id, Subscription.minute).all()
+
+
+@traced("crud.mark_user_blocked")
+def mark_user_blocked(db: Session, telegram_id: int):
+    user = db.query(User).filter_by(telegram_id=telegram_id).first()
+    if user and not user.blocked:
+        user.blocked = True
+        db.commit()
@@ -0,0 +1,62 @@
+import math
+import time
+
+from aiogram import F
+from aiogram.filters import Command
+from aiogram.types import BufferedInputFile, Message
+
+from core.config import ADMIN_IDS, PROFILE_DEFAULT_SECONDS, PROFILE_MAX_SECONDS
+from handlers.messages import PROFILE_STARTED, PROFILE_BUSY, CPU_PROFILE_CAPTION, MEMORY_PROFILE_CAPTION
+from utils.profiling import ProfilerBusy, cpu_profile, memory_report
+from utils.weather_api import get_cache_sizes
+
+
+def _profile_seconds(message: Message) -> float:
+    """Duration argument of the command, e.g. `/profile 60`, clamped to PROFILE_MAX_SECONDS."""
+    args = message.text.split()
+    try:
+        seconds = float(args[1]) if len(args) > 1 else PROFILE_DEFAULT_SECONDS
+    except ValueError:
+        seconds = PROFILE_DEFAULT_SECONDS
+    if not math.isfinite(seconds):
+        seconds = PROFILE_DEFAULT_SECONDS
+    return min(max(seconds, 1), PROFILE_MAX_SECONDS)
+
+
+def _announce_start(message: Message, seconds: float):
+    """on_start callback for the "profiling started" reply, sent only once the profiler has been claimed."""
+    return lambda: message.answer(PROFILE_STARTED.format(seconds=seconds))
+
+
+async def cpu_profile_handler(message: Message) -> None:
+    seconds = _profile_seconds(message)
+    try:
+        profile = await cpu_profile(seconds, on_start=_announce_start(message, seconds))
+    except ProfilerBusy:
+        await message.answer(PROFILE_BUSY)
+        return
+    samples = sum(int(line.rsplit(b" ", 1)[1]) for line in profile.splitlines())
+    await message.answer_document(
+        BufferedInputFile(profile, filename=f"cpu-{int(time.time())}.folded"),
+        caption=CPU_PROFILE_CAPTION.format(seconds=seconds, samples=samples),
+    )
+
+
+async def memory_profile_handler(message: Message) -> None:
+    seconds = _profile_seconds(message)
+    try:
+        report = await memory_report(seconds, cache_sizes=get_cache_sizes, on_start=_announce_start(message, seconds))
+    except ProfilerBusy:
+        await message.answer(PROFILE_BUSY)
+        return
+    await message.answer_document(
+        BufferedInputFile(report.encode(), filename=f"memory-{int(time.time())}.txt"),
+        caption=MEMORY_PROFILE_CAPTION,
+    )
+
+
+def register_admin(dp):
+    """Admin-only commands; messages from anyone outside ADMIN_IDS fall through to the other handlers."""
+    is_admin = F.from_user.id.in_(ADMIN_IDS)
+    dp.message.register(cpu_profile_handler, Command("profile"), is_admin)
+    dp.message.register(memory_profile_handler, Command("memprofile"), is_admin)
@@ -57,3 +57,9 @@ UNKNOWN_SUBSCRIPTION_TYPE = "Unknown subscription type. Please try again."
 UNKNOWN_SUBSCRIPTION_FREQUENCY = "Unknown subscription frequency. Please try again."
 GENERIC_SUBSCRIPTION_ERROR = "An unexpected error occurred. Please try again later."
 UNKNOWN_COMMAND = "Unknown command. Please try again."
+
+# ----MESSAGES FOR ADMIN HANDLER----#
+PROFILE_STARTED = "Profiling for {seconds:g}s, the result will follow."
+PROFILE_BUSY = "Another profile is still running. Please wait until it finishes."
+CPU_PROFILE_CAPTION = "CPU profile, {seconds:g}s, {samples} samples (collapsed stacks for flamegraph.pl or speedscope)"
+MEMORY_PROFILE_CAPTION = "Top allocation sites and cache sizes"
@@ -6,8 +6,7 @@ from aiogram.fsm.context import FSMContext
 from aiogram.filters import Command, StateFilter
 
 from core.config import WEATHER_API_KEY
-from core.database.db_connector import SessionLocal
-from crud.subscription import add_subscription, remove_subscription, get_user_subscriptions
+from crud.async_subscription import add_subscriptions, remove_subscription, get_user_subscriptions
 from utils.format_message import get_time_text
 from utils.weather_api import get_current_weather_full
 
@@ -38,8 +37,7 @@ async def subscribe_start_handler(message: Message, state: FSMContext):
 
 async def subscribe_cancel_handler(message: Message, state: FSMContext):
     telegram_id = message.from_user.id
-    with SessionLocal() as db:
-        remove_subscription(db, telegram_id)
+    await remove_subscription(telegram_id)
     await state.clear()
     await message.answer(CANCEL_TEXT, reply_markup=main_keyboard)
 
@@ -78,9 +76,7 @@ async def subscribe_city_handler(message: Message, state: FSMContext):
         await message.answer(CITY_NOT_FOUND_MSG, reply_markup=main_keyboard)
         return
 
-    with SessionLocal() as db:
-        for user_time in time_list:
-            add_subscription(db, telegram_id, city, info_type, user_time)
+    await add_subscriptions(telegram_id, city, info_type, time_list)
 
     await message.answer(
         SUCCESS_TEXT.format(
@@ -95,23 +91,22 @@ async def subscribe_city_handler(message: Message, state: FSMContext):
 
 async def handle_my_subscription(message: Message):
     telegram_id = message.from_user.id
-    with SessionLocal() as db:
-        subs = get_user_subscriptions(db, telegram_id)
-        if not subs:
-            await message.answer(NO_SUBSCRIPTION_TEXT, reply_markup=main_keyboard)
-            return
-
-        lines = []
-        for sub in subs:
-            info_type = sub.subscription_type.description if hasattr(sub, "subscription_type") else sub.info_type
-            lines.append(
-                MY_SUBSCRIPTION_TEXT.format(
-                    info_type=info_type,
-                    city=sub.city,
-                    time=get_time_text(sub.time),
-                )
+    subs = await get_user_subscriptions(telegram_id)
+    if not subs:
+        await message.answer(NO_SUBSCRIPTION_TEXT, reply_markup=main_keyboard)
+        return
+
+    lines = []
+    for sub in subs:
+        info_type = sub.subscription_type.description if hasattr(sub, "subscription_type") else sub.info_type
+        lines.append(
+            MY_SUBSCRIPTION_TEXT.format(
+                info_type=info_type,
+                city=sub.city,
+                time=get_time_text(sub.time),
             )
-        await message.answer("\n\n".join(lines), reply_markup=main_keyboard)
+        )
+    await message.answer("\n\n".join(lines), reply_markup=main_keyboard)
 
 
 def register_subscribe(dp):
@@ -1,3 +1,5 @@
+from functools import wraps
+
 from aiogram.filters import Command
 from aiogram.types import Message
 from aiogram import types
@@ -13,15 +15,14 @@ from utils.format_message import (
     format_weather_message, format_air_quality_message, format_details_message,
     format_sunrise_sunset_message, format_wind_message,
 )
+from utils.message_cache import rendered_messages
 from utils.translit_utils import transliterate_city
-from utils.weather_api import (
-    get_current_weather_full, get_forecast_json,
-    get_city_coordinates, get_air_quality,
-)
+from utils.weather_api import get_location_snapshot
 
 
 def parse_city_and_handle_errors(example_command):
     def decorator(func):
+        @wraps(func)
         async def wrapper(message: Message, *args, **kwargs):
             command = message.text.split(maxsplit=1)
             if len(command) < 2:
@@ -40,6 +41,11 @@ def parse_city_and_handle_errors(example_command):
     return decorator
 
 
+def render(kind: str, section: str, city: str, snapshot, formatter, *args) -> str:
+    """Render a reply from a snapshot section through the shared rendered-message cache (utils/message_cache.py)."""
+    return rendered_messages.render(kind, city, snapshot.version(section), formatter, *args, section=section)
+
+
 async def start_handler(message: Message) -> None:
     await message.answer(START_TEXT, reply_markup=main_keyboard)
 
@@ -50,69 +56,74 @@ async def help_handler(message: Message) -> None:
 
 @parse_city_and_handle_errors("/weather London")
 async def weather_handler(message: Message, city, **kwargs):
-    data = await get_current_weather_full(city, WEATHER_API_KEY)
-    if not data:
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, ("current",))
+    if not snapshot:
         await message.answer(API_ERROR.format(what="weather"))
         return
-    msg = format_weather_message(data)
+    msg = render("weather", "current", city, snapshot, format_weather_message, snapshot.current)
     await message.answer(msg)
 
 
 @parse_city_and_handle_errors("/details Rome")
 async def details_handler(message: Message, city, **kwargs):
-    data = await get_current_weather_full(city, WEATHER_API_KEY)
-    if not data:
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, ("current",))
+    if not snapshot:
         await message.answer(API_ERROR.format(what="detailed weather"))
         return
-    msg = format_details_message(data)
+    msg = render("details", "current", city, snapshot, format_details_message, snapshot.current)
     await message.answer(msg)
 
 
 @parse_city_and_handle_errors("/sun Rome")
 async def sun_handler(message: Message, city, **kwargs):
-    data = await get_current_weather_full(city, WEATHER_API_KEY)
-    if not data:
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, ("current",))
+    if not snapshot:
         await message.answer(API_ERROR.format(what="sun info"))
         return
-    msg = format_sunrise_sunset_message(data)
+    msg = render("sun", "current", city, snapshot, format_sunrise_sunset_message, snapshot.current)
     await message.answer(msg)
 
 
 @parse_city_and_handle_errors("/wind Rome")
 async def wind_handler(message: Message, city, **kwargs):
-    data = await get_current_weather_full(city, WEATHER_API_KEY)
-    if not data:
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, ("current",))
+    if not snapshot:
         await message.answer(API_ERROR.format(what="wind info"))
         return
-    msg = format_wind_message(data)
+    msg = render("wind", "current", city, snapshot, format_wind_message, snapshot.current)
     await message.answer(msg)
 
 
 @parse_city_and_handle_errors("/hourly Rome")
 async def hourly_handler(message: Message, city, **kwargs):
-    data = await get_forecast_json(city, WEATHER_API_KEY)
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, ("forecast",))
+    data = snapshot.forecast if snapshot else None
     if not data:
         await message.answer(API_ERROR.format(what="forecast"))
         return
-    forecasts = data.get("list", [])
-    result = format_hourly_message(city, forecasts)
+    result = render("hourly", "forecast", city, snapshot, format_hourly_message, city, data)
     await message.answer(result)
 
 
 @parse_city_and_handle_errors("/air Paris")
 async def air_handler(message: Message, city, **kwargs):
-    lat, lon = await get_city_coordinates(city, WEATHER_API_KEY)
-    if not lat or not lon:
+    snapshot = await get_location_snapshot(city, WEATHER_API_KEY, ("air",))
+    if not snapshot:
         await message.answer(CITY_NOT_FOUND)
         return
-    data = await get_air_quality(lat, lon, WEATHER_API_KEY)
+    data = snapshot.air
     if not data or "list" not in data or not data["list"]:
         await message.answer(API_ERROR.format(what="air quality"))
         return
-    msg = format_air_quality_message(city, data["list"][0])
+    msg = render("air", "air", city, snapshot, format_air_quality_message, city, data["list"][0])
     await message.answer(msg)
 
 
+def _render_forecast(city: str, data, days: int) -> str:
+    grouped = group_forecasts_by_day(data, min(days * 8, len(data)))
+    return format_forecast_message(city, data, grouped, days)
+
+
 @parse_city_and_handle_errors("/forecast Paris 2")
 async def forecast_handler(message: Message, city, **kwargs):
     args = message.text.split()
@@ -126,15 +137,13 @@ async def forecast_handler(message: Message, city, **kwargs):
             pass
 
     city_name = args[1]
-    data = await get_forecast_json(city_name, WEATHER_API_KEY)
+    snapshot = await get_location_snapshot(city_name, WEATHER_API_KEY, ("forecast",))
+    data = snapshot.forecast if snapshot else None
     if not data:
         await message.answer(API_ERROR.format(what="forecast"))
         return
 
-    forecasts = data.get("list", [])
-    max_intervals = min(days * 8, len(forecasts))
-    grouped = group_forecasts_by_day(forecasts, max_intervals)
-    result = format_forecast_message(city_name, grouped, days)
+    result = render(f"forecast:{days}", "forecast", city_name, snapshot, _render_forecast, city_name, data, days)
     await message.answer(result)
 
 
@@ -0,0 +1,174 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class CacheEntry:
+    __slots__ = ("value", "stored_at", "expires_at", "size")
+
+    def __init__(self, value: Any, stored_at: float, expires_at: float, size: int):
+        self.value = value
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+        self.size = size
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Rough payload size in bytes: the value's own `nbytes` if it reports one,
+    otherwise the length of its JSON encoding.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return nbytes
+    try:
+        return len(json.dumps(value, separators=(",", ":"), default=str))
+    except (TypeError, ValueError):
+        return 0
+
+
+class LRUCache:
+    """
+    In-memory cache with per-instance TTL, LRU eviction and size limits.
+
+    Entries expire `ttl` seconds after they are stored. When the cache holds more
+    than `max_entries` items, or more than `max_bytes` of estimated payload, the
+    least recently used entries are evicted. Expired entries are swept at most
+    once every `sweep_interval` seconds on writes, so memory stays bounded even
+    for keys that are never read again. `on_evict(key)`, if given, is called for
+    every entry dropped by eviction or expiry.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            ttl: float,
+            max_entries: int = 1000,
+            max_bytes: Optional[int] = None,
+            sweep_interval: float = 60,
+            on_evict: Optional[Callable[[Hashable], None]] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval = sweep_interval
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._last_sweep = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and entry.expires_at > time.time()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return entry.value if entry is not None else default
+
+    def get_entry(self, key: Hashable) -> Optional[CacheEntry]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            if self.on_evict is not None:
+                self.on_evict(key)
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def peek(self, key: Hashable) -> Optional[CacheEntry]:
+        """Return the entry for `key`, even if expired, without touching LRU order or hit counters."""
+        return self._data.get(key)
+
+    def set(
+            self,
+            key: Hashable,
+            value: Any,
+            ttl: Optional[float] = None,
+            stored_at: Optional[float] = None,
+    ) -> None:
+        """
+        Store `value` under `key`. `stored_at` keeps the original fetch time
+        when an entry is promoted from another cache tier.
+        """
+        now = time.time()
+        if stored_at is None:
+            stored_at = now
+        if key in self._data:
+            self._remove(key)
+        size = estimate_size(value) if self.max_bytes is not None else 0
+        self._data[key] = CacheEntry(value, stored_at, stored_at + (self.ttl if ttl is None else ttl), size)
+        self._bytes += size
+
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep()
+        self._enforce_limits()
+
+    def delete(self, key: Hashable) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def sweep(self) -> int:
+        """Drop every expired entry. Returns the number of removed entries."""
+        now = time.time()
+        expired = [key for key, entry in self._data.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+            if self.on_evict is not None:
+                self.on_evict(key)
+        self.expirations += len(expired)
+        self._last_sweep = now
+        return len(expired)
+
+    def estimated_bytes(self) -> int:
+        """Estimated payload size; computed on demand when the cache has no `max_bytes` accounting."""
+        if self.max_bytes is not None:
+            return self._bytes
+        return sum(estimate_size(entry.value) for entry in self._data.values())
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def _enforce_limits(self) -> None:
+        while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1
+        ):
+            key, entry = self._data.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(key)
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Tuple
+
+
+class SQLiteCacheStore:
+    """
+    Persistent second-tier cache backed by a local SQLite file.
+
+    Payloads are stored as JSON together with their fetch time and expiry, so
+    they survive restarts and can be shared by several bot processes using the
+    same file. All I/O runs on a dedicated thread.
+    """
+
+    def __init__(self, path: str, purge_interval: float = 300):
+        self.path = path
+        self.purge_interval = purge_interval
+        self.stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-store")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._last_purge = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " namespace TEXT NOT NULL,"
+                " key TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " stored_at REAL NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key)"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_expires_at ON cache (expires_at)")
+            self._conn = conn
+        return self._conn
+
+    def _get(self, namespace: str, key: str) -> Optional[Tuple[Any, float, float]]:
+        row = self._connection().execute(
+            "SELECT value, stored_at, expires_at FROM cache"
+            " WHERE namespace = ? AND key = ? AND expires_at > ?",
+            (namespace, key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def _set(self, namespace: str, key: str, value: Any, stored_at: float, expires_at: float) -> None:
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache (namespace, key, value, stored_at, expires_at)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, separators=(",", ":")), stored_at, expires_at),
+        )
+        now = time.time()
+        if now - self._last_purge >= self.purge_interval:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+            self._last_purge = now
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def get(self, namespace: str, key: str) -> Optional[Tuple[Any, float, float]]:
+        """Return (value, stored_at, expires_at) for a live entry, or None."""
+        try:
+            row = await self._run(self._get, namespace, key)
+        except (sqlite3.Error, ValueError):
+            self.stats["errors"] += 1
+            return None
+        self.stats["hits" if row is not None else "misses"] += 1
+        return row
+
+    async def set(self, namespace: str, key: str, value: Any, stored_at: float, expires_at: float) -> None:
+        try:
+            await self._run(self._set, namespace, key, value, stored_at, expires_at)
+        except (sqlite3.Error, TypeError, ValueError):
+            self.stats["errors"] += 1
+            return
+        self.stats["writes"] += 1
+
+    def close(self) -> None:
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
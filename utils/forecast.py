@@ -0,0 +1,90 @@
+import datetime
+import sys
+from array import array
+from functools import lru_cache
+
+_HHMM = tuple(f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60))
+
+
+@lru_cache(maxsize=64)
+def _day_to_date(day: int) -> str:
+    # Every cached forecast covers the same handful of days, so each date is formatted once.
+    return datetime.datetime.utcfromtimestamp(day * 86400).strftime('%Y-%m-%d')
+
+
+class ParsedForecast:
+    """
+    Compact, array-backed form of an OpenWeather 5-day / 3-hour forecast.
+
+    Each field is a parallel array indexed by forecast step: UTC timestamps as
+    ints, temperatures and wind speed as floats, humidity and the weather
+    condition code as small ints. Descriptions are interned, so repeated values
+    ("Light rain", "Clear sky", ...) share one string object across all cities.
+    """
+    __slots__ = ("dt", "temp", "feels", "wind", "humidity", "code", "desc")
+
+    def __init__(self):
+        self.dt = array("q")
+        self.temp = array("d")
+        self.feels = array("d")
+        self.wind = array("d")
+        self.humidity = array("B")
+        self.code = array("H")
+        self.desc = []
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+    @property
+    def nbytes(self) -> int:
+        arrays = (self.dt, self.temp, self.feels, self.wind, self.humidity, self.code)
+        return sum(a.itemsize * len(a) for a in arrays) + 8 * len(self.desc)
+
+    @classmethod
+    def from_json(cls, entries: list) -> "ParsedForecast":
+        """Parse the `list` section of a forecast response."""
+        parsed = cls()
+        for f in entries:
+            main = f["main"]
+            weather = f["weather"][0]
+            temp = float(main["temp"])
+            parsed.dt.append(int(f["dt"]))
+            parsed.temp.append(temp)
+            parsed.feels.append(float(main.get("feels_like", temp)))
+            parsed.wind.append(float(f["wind"]["speed"]))
+            parsed.humidity.append(int(main["humidity"]))
+            parsed.code.append(int(weather.get("id", 0)))
+            parsed.desc.append(sys.intern(weather["description"].capitalize()))
+        return parsed
+
+    def to_payload(self) -> dict:
+        """Plain JSON-serializable form, used by the persistent cache tier."""
+        return {
+            "dt": self.dt.tolist(),
+            "temp": self.temp.tolist(),
+            "feels": self.feels.tolist(),
+            "wind": self.wind.tolist(),
+            "humidity": self.humidity.tolist(),
+            "code": self.code.tolist(),
+            "desc": self.desc,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: dict) -> "ParsedForecast":
+        parsed = cls()
+        parsed.dt.extend(payload["dt"])
+        parsed.temp.extend(payload["temp"])
+        parsed.feels.extend(payload["feels"])
+        parsed.wind.extend(payload["wind"])
+        parsed.humidity.extend(payload["humidity"])
+        parsed.code.extend(payload["code"])
+        parsed.desc = [sys.intern(d) for d in payload["desc"]]
+        return parsed
+
+    def date(self, i: int) -> str:
+        """UTC date of step `i` as YYYY-MM-DD (same as the date part of `dt_txt`)."""
+        return _day_to_date(self.dt[i] // 86400)
+
+    def time(self, i: int) -> str:
+        """UTC time of step `i` as HH:MM (same as the time part of `dt_txt`)."""
+        return _HHMM[self.dt[i] % 86400 // 60]
@@ -1,5 +1,8 @@
 import datetime
-from collections import defaultdict
+from functools import lru_cache
+
+from utils.forecast import ParsedForecast
+from utils.tracing import traced
 
 WEATHER_ICONS = {
     "clear": "☀️",
@@ -13,6 +16,7 @@ WEATHER_ICONS = {
 }
 
 
+@lru_cache(maxsize=512)
 def get_weather_emoji(desc: str) -> str:
     desc = desc.lower()
     for key, emoji in WEATHER_ICONS.items():
@@ -21,55 +25,50 @@ def get_weather_emoji(desc: str) -> str:
     return "🌡️"
 
 
-def group_forecasts_by_day(forecasts: list, max_intervals: int) -> dict:
-    grouped = defaultdict(list)
-    for f in forecasts[:max_intervals]:
-        date = f["dt_txt"].split()[0]
-        grouped[date].append(f)
+@traced("format.group_forecasts_by_day")
+def group_forecasts_by_day(forecast: ParsedForecast, max_intervals: int) -> dict:
+    """Group the first `max_intervals` forecast steps by UTC date: {'YYYY-MM-DD': [step indices]}."""
+    grouped = {}
+    current_day = None
+    indices = None
+    for i in range(min(max_intervals, len(forecast))):
+        day = forecast.dt[i] // 86400
+        if day != current_day:
+            current_day = day
+            indices = grouped.setdefault(forecast.date(i), [])
+        indices.append(i)
     return grouped
 
 
-def format_forecast_message(city: str, grouped: dict, days: int) -> str:
-    result = f"🌤 <b>Weather forecast for {city} (next {days} day(s)):</b>\n"
-    for date, entries in grouped.items():
-        result += f"\n\n<b>{date}</b>\n"
-        for f in entries:
-            time = f["dt_txt"].split()[1][:5]
-            temp = f["main"]["temp"]
-            feels = f["main"].get("feels_like", temp)
-            desc = f["weather"][0]["description"].capitalize()
-            wind = f["wind"]["speed"]
-            humidity = f["main"]["humidity"]
-            icon = get_weather_emoji(desc)
-            result += (
-                f"{time} {icon} {desc}, "
-                f"{temp:.1f}°C (feels {feels:.1f}°C), "
-                f"💨 {wind} m/s, 💧 {humidity}%\n"
-            )
-    return result
-
-
-def format_hourly_message(city: str, forecasts: list) -> str:
-    result = f"🕒 <b>Hourly forecast for {city} (next 24h):</b>\n"
-    for f in forecasts[:8]:
-        dt_txt = f["dt_txt"]
-        time = dt_txt.split(" ")[1][:5]
-        temp = f["main"]["temp"]
-        feels = f["main"].get("feels_like", temp)
-        desc = f["weather"][0]["description"].capitalize()
-        wind = f["wind"]["speed"]
-        humidity = f["main"]["humidity"]
-        icon = get_weather_emoji(desc)
-        result += (
-            f"\n<b>{time}</b> {icon} {desc}, "
-            f"{temp:.1f}°C (feels {feels:.1f}°C), "
-            f"💨 {wind} m/s, 💧 {humidity}%"
-        )
-    return result
+def _format_forecast_step(forecast: ParsedForecast, i: int) -> str:
+    desc = forecast.desc[i]
+    return (
+        f"{get_weather_emoji(desc)} {desc}, "
+        f"{forecast.temp[i]:.1f}°C (feels {forecast.feels[i]:.1f}°C), "
+        f"💨 {forecast.wind[i]:g} m/s, 💧 {forecast.humidity[i]}%"
+    )
+
+
+@traced("format.format_forecast_message")
+def format_forecast_message(city: str, forecast: ParsedForecast, grouped: dict, days: int) -> str:
+    parts = [f"🌤 <b>Weather forecast for {city} (next {days} day(s)):</b>\n"]
+    for date, indices in grouped.items():
+        parts.append(f"\n\n<b>{date}</b>\n")
+        for i in indices:
+            parts.append(f"{forecast.time(i)} {_format_forecast_step(forecast, i)}\n")
+    return "".join(parts)
+
+
+@traced("format.format_hourly_message")
+def format_hourly_message(city: str, forecast: ParsedForecast) -> str:
+    parts = [f"🕒 <b>Hourly forecast for {city} (next 24h):</b>\n"]
+    for i in range(min(8, len(forecast))):
+        parts.append(f"\n<b>{forecast.time(i)}</b> {_format_forecast_step(forecast, i)}")
+    return "".join(parts)
 
 
+@traced("format.format_weather_message")
 def format_weather_message(data: dict) -> str:
-    import datetime
     city_name = data.get("name", "")
     temp = data.get("main", {}).get("temp")
     feels = data.get("main", {}).get("feels_like", temp)
@@ -95,6 +94,7 @@ def format_weather_message(data: dict) -> str:
     )
 
 
+@traced("format.format_air_quality_message")
 def format_air_quality_message(city: str, air_info: dict) -> str:
     aqi = air_info["main"]["aqi"]
     components = air_info.get("components", {})
@@ -120,6 +120,7 @@ def format_air_quality_message(city: str, air_info: dict) -> str:
     )
 
 
+@traced("format.format_details_message")
 def format_details_message(data: dict) -> str:
     city_name = data.get("name", "")
     country = data.get("sys", {}).get("country", "")
@@ -172,6 +173,7 @@ def format_details_message(data: dict) -> str:
     )
 
 
+@traced("format.format_sunrise_sunset_message")
 def format_sunrise_sunset_message(data: dict) -> str:
     city_name = data.get("name", "")
     country = data.get("sys", {}).get("country", "")
@@ -192,6 +194,7 @@ def format_sunrise_sunset_message(data: dict) -> str:
     )
 
 
+@traced("format.format_wind_message")
 def format_wind_message(data: dict) -> str:
     city_name = data.get("name", "")
     country = data.get("sys", {}).get("country", "")
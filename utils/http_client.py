@@ -0,0 +1,70 @@
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+DEFAULT_POOL_SIZE = 100
+DEFAULT_POOL_PER_HOST = 30
+DEFAULT_KEEPALIVE_TIMEOUT = 60
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 10
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def start_http_client(
+        pool_size: int = DEFAULT_POOL_SIZE,
+        pool_per_host: int = DEFAULT_POOL_PER_HOST,
+        keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+) -> aiohttp.ClientSession:
+    """
+    Create the shared HTTP session used for all OpenWeather requests.
+
+    Connections are kept alive and reused between calls, so repeated requests
+    skip the TCP/TLS handshake and the DNS lookup.
+    """
+    global _session
+    if _session is not None and not _session.closed:
+        return _session
+
+    connector = aiohttp.TCPConnector(
+        limit=pool_size,
+        limit_per_host=pool_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_cache_ttl,
+        use_dns_cache=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=None,
+        connect=connect_timeout,
+        sock_read=read_timeout,
+    )
+    _session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+    return _session
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP session and release pooled connections."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    """
+    Return the shared HTTP session.
+
+    Falls back to a session with default settings when the bot lifecycle
+    has not started one (e.g. when the fetchers are used from a script).
+    """
+    if _session is None or _session.closed:
+        return await start_http_client()
+    return _session
+
+
+HTTP_ERRORS = (aiohttp.ClientError, asyncio.TimeoutError)
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import statistics
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+LAG_SECONDS = registry.histogram(
+    "event_loop_lag_seconds", "How late the watchdog's periodic wake-up ran",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+STALLS = registry.counter("event_loop_stalls_total", "Times the event loop was blocked past the threshold")
+DB_ON_LOOP = registry.counter(
+    "event_loop_sync_db_total", "Synchronous database connections opened on the event loop thread"
+)
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag and reports what is blocking the loop.
+
+    A task on the loop wakes every `interval` seconds and records how late it
+    woke up. A separate thread watches those heartbeats: when the loop has not
+    come back for `threshold` seconds it logs the loop thread's current stack,
+    i.e. the code that is blocking it, once per stall. Lag percentiles over the
+    last `window` samples are logged every `report_interval` seconds.
+
+    `watch_engine()` is a debug aid: it logs every synchronous SQLAlchemy
+    connection checked out on the loop thread instead of the database executor.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, report_interval: float = 60,
+                 window: int = 6000):
+        self.interval = interval
+        self.threshold = threshold
+        self.report_interval = report_interval
+        self.samples = deque(maxlen=window)
+        self.stalls = 0
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start watching the running loop; call from the loop thread."""
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._thread = threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def stats(self) -> dict:
+        """Lag percentiles in milliseconds over the recent window, plus stall count."""
+        samples = list(self.samples)
+        if len(samples) < 2:
+            p50 = p95 = p99 = samples[0] if samples else 0.0
+        else:
+            cuts = statistics.quantiles(samples, n=100, method="inclusive")
+            p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+        return {
+            "samples": len(samples),
+            "p50_ms": p50 * 1000,
+            "p95_ms": p95 * 1000,
+            "p99_ms": p99 * 1000,
+            "max_ms": max(samples, default=0.0) * 1000,
+            "stalls": self.stalls,
+        }
+
+    async def _measure(self) -> None:
+        last_report = time.monotonic()
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._last_beat = now
+            lag = max(0.0, now - started - self.interval)
+            self.samples.append(lag)
+            LAG_SECONDS.observe(lag)
+            if now - last_report >= self.report_interval:
+                last_report = now
+                stats = self.stats()
+                logger.info(
+                    "Event loop lag over %d samples: p50 %.1fms, p95 %.1fms, p99 %.1fms, max %.1fms; %d stalls",
+                    stats["samples"], stats["p50_ms"], stats["p95_ms"], stats["p99_ms"], stats["max_ms"],
+                    stats["stalls"],
+                )
+
+    def _monitor(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(min(self.interval, self.threshold / 2)):
+            beat = self._last_beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat
+            self.stalls += 1
+            STALLS.inc()
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "<no frame>\n"
+            logger.warning("Event loop blocked for %.0fms so far; loop thread is at:\n%s", blocked * 1000, stack)
+
+    def watch_engine(self, engine) -> None:
+        """Log every connection checkout from `engine` that happens on the loop thread."""
+        from sqlalchemy import event
+
+        event.listen(engine, "checkout", self._on_checkout)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        if threading.get_ident() != self._loop_thread_id:
+            return
+        DB_ON_LOOP.inc()
+        # Skip SQLAlchemy's own frames so the caller that opened the session is visible.
+        frames = [frame for frame in traceback.extract_stack()[:-1] if "sqlalchemy" not in frame.filename]
+        stack = "".join(traceback.format_list(frames[-10:]))
+        logger.warning("Synchronous database session opened on the event loop thread; use run_db():\n%s", stack)
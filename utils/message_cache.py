@@ -0,0 +1,97 @@
+from typing import Callable, Hashable, Optional
+
+from utils.cache import LRUCache
+
+MESSAGE_CACHE_TTL = 60 * 60
+MESSAGE_CACHE_MAX_ENTRIES = 5000
+
+
+class RenderedMessageCache:
+    """
+    Memoizes rendered messages per (message type, city, payload version).
+
+    The version is the fetch time of the payload the message was rendered from
+    (`LocationSnapshot.version(section)`), so each distinct message is built
+    once per data refresh no matter how many subscribers or users ask for it.
+    Versions are tracked per (city, section): when a newer payload for a section
+    shows up, or `invalidate()` is called, every message rendered from the old
+    one is dropped, while messages of the city's other sections stay. Messages
+    rendered from a payload older than the newest one seen are returned but not
+    cached. A (city, section) is forgotten once its last message is evicted or
+    expires, so the bookkeeping stays as bounded as the messages themselves.
+    """
+
+    def __init__(self, ttl: float = MESSAGE_CACHE_TTL, max_entries: int = MESSAGE_CACHE_MAX_ENTRIES):
+        self._messages = LRUCache("messages", ttl=ttl, max_entries=max_entries, on_evict=self._evicted)
+        self._versions = {}
+        self._keys = {}
+        self.renders = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    @staticmethod
+    def _location(city: str) -> str:
+        return city.strip().lower()
+
+    def render(self, kind: Hashable, city: str, version: float, formatter: Callable, *args,
+               section: str = "") -> Optional[str]:
+        """Return `formatter(*args)`, rendering it only once per (kind, city, version)."""
+        source = (self._location(city), section)
+        latest = self._versions.get(source)
+        if latest is not None and version < latest:
+            self.renders += 1
+            return formatter(*args)
+        if latest != version:
+            self._drop(source)
+            self._versions[source] = version
+
+        key = (kind, city, section, version)
+        message = self._messages.get(key)
+        if message is None:
+            self.renders += 1
+            message = formatter(*args)
+            if message is not None:
+                # Registered first, so evictions made room for it cannot forget the source's version.
+                self._keys.setdefault(source, set()).add(key)
+                self._messages.set(key, message)
+            elif source not in self._keys:
+                self._versions.pop(source, None)
+        return message
+
+    def invalidate(self, city: str, section: Optional[str] = None) -> None:
+        """Drop every message rendered for `city`, or only those rendered from its `section`."""
+        location = self._location(city)
+        for source in [source for source in self._versions.keys() | self._keys.keys() if source[0] == location]:
+            if section is None or source[1] == section:
+                self._drop(source)
+
+    def _evicted(self, key: tuple) -> None:
+        _, city, section, _ = key
+        source = (self._location(city), section)
+        keys = self._keys.get(source)
+        if keys is None:
+            return
+        keys.discard(key)
+        if not keys:
+            del self._keys[source]
+            self._versions.pop(source, None)
+
+    def _drop(self, source: tuple) -> None:
+        self._versions.pop(source, None)
+        for key in self._keys.pop(source, ()):
+            self._messages.delete(key)
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._versions.clear()
+        self._keys.clear()
+
+    def estimated_bytes(self) -> int:
+        return self._messages.estimated_bytes()
+
+    def stats(self) -> dict:
+        return {**self._messages.stats(), "renders": self.renders}
+
+
+rendered_messages = RenderedMessageCache()
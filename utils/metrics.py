@@ -0,0 +1,173 @@
+import bisect
+import logging
+from typing import Callable, Iterable, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# (metric name, type, help, [(labels dict, value), ...]) as yielded by collectors.
+Family = Tuple[str, str, str, list]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+
+    def _key(self, label_values: tuple) -> tuple:
+        if len(label_values) != len(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {label_values}")
+        return tuple(str(v) for v in label_values)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        key = self._key(label_values)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self) -> Iterable[Family]:
+        yield self.name, self.type, self.help, [
+            (dict(zip(self.labels, key)), value) for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, *label_values) -> None:
+        self._values[self._key(label_values)] = value
+
+    def collect(self) -> Iterable[Family]:
+        yield self.name, self.type, self.help, [
+            (dict(zip(self.labels, key)), value) for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram; `observe()` is O(log buckets)."""
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *label_values) -> None:
+        key = self._key(label_values)
+        series = self._values.get(key)
+        if series is None:
+            series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def collect(self) -> Iterable[Family]:
+        samples = []
+        for key, (counts, total, count) in self._values.items():
+            labels = dict(zip(self.labels, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                samples.append(({**labels, "le": _format_value(float(bound))}, cumulative, "_bucket"))
+            samples.append((labels, total, "_sum"))
+            samples.append((labels, count, "_count"))
+        yield self.name, self.type, self.help, samples
+
+
+class Registry:
+    """
+    Holds the process's metrics and renders them in the Prometheus text format.
+
+    Besides counters, gauges and histograms updated in place, callables added
+    with `add_collector()` are asked for their samples at scrape time, so
+    existing stats dicts (cache counters, delivery stats) are exported as-is.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        families = [family for metric in self._metrics for family in metric.collect()]
+        for collector in self._collectors:
+            try:
+                families.extend(collector())
+            except Exception:
+                logger.exception("Metrics collector %r failed", collector)
+        for name, metric_type, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+_runner: Optional[web.AppRunner] = None
+
+
+async def _handle_metrics(request: web.Request) -> web.Response:
+    return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8")
+
+
+async def start_metrics_server(host: str, port: int) -> None:
+    """Serve `registry` at http://host:port/metrics."""
+    global _runner
+    app = web.Application()
+    app.router.add_get("/metrics", _handle_metrics)
+    _runner = web.AppRunner(app, access_log=None)
+    await _runner.setup()
+    await web.TCPSite(_runner, host, port).start()
+    logger.info("Metrics available at http://%s:%s/metrics", host, port)
+
+
+async def stop_metrics_server() -> None:
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
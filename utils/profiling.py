@@ -0,0 +1,135 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Awaitable, Callable, Optional
+
+# Allocations made by the profiler itself or the import machinery are noise in the report.
+_MEMORY_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is still running."""
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(seconds: float, interval: float = 0.005) -> Counter:
+    """
+    Sample the stack of every other thread each `interval` seconds for `seconds`.
+
+    Returns a Counter of collapsed stacks ("thread;outer;...;inner") to sample
+    counts. This is wall-clock sampling: threads waiting on I/O or a queue are
+    sampled too, under their thread name, so compare frames within a thread.
+    """
+    me = threading.get_ident()
+    names = {}
+    counts = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me:
+                continue
+            if ident not in names:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            counts[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return counts
+
+
+async def cpu_profile(seconds: float, interval: float = 0.005,
+                      on_start: Optional[Callable[[], Awaitable]] = None) -> bytes:
+    """
+    Profile the process for `seconds` without blocking the loop and return the
+    samples in the collapsed-stack format read by flamegraph.pl and speedscope.
+    `on_start()` is awaited once the profiler is claimed, before sampling starts.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        if on_start is not None:
+            await on_start()
+        counts = await asyncio.to_thread(sample_stacks, seconds, interval)
+    finally:
+        _busy.release()
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common()).encode()
+
+
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GiB"
+
+
+async def memory_report(seconds: float, limit: int = 25, cache_sizes: Optional[Callable[[], list]] = None,
+                        on_start: Optional[Callable[[], Awaitable]] = None) -> str:
+    """
+    Return the top `limit` allocation sites of live memory as text, followed by
+    the (name, entries, bytes) tuples returned by `cache_sizes`.
+
+    If tracemalloc is not already tracing (PYTHONTRACEMALLOC), it is started
+    for `seconds` and stopped afterwards, so only memory allocated during that
+    window and still alive at its end is attributed. If it is, snapshots are
+    taken before and after the `seconds` window and the sites are ranked by
+    how much their live memory grew in between. `on_start()` is awaited once
+    the profiler is claimed, before the window starts.
+    """
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    started_here = not tracemalloc.is_tracing()
+    try:
+        if on_start is not None:
+            await on_start()
+        if started_here:
+            tracemalloc.start()
+        else:
+            before = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+        await asyncio.sleep(seconds)
+        snapshot = tracemalloc.take_snapshot().filter_traces(_MEMORY_FILTERS)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _busy.release()
+
+    if started_here:
+        lines = [f"Live memory allocated during the last {seconds:g}s: {_format_bytes(current)} "
+                 f"(peak {_format_bytes(peak)})", ""]
+        lines.append(f"Top {limit} allocation sites:")
+        for index, stat in enumerate(snapshot.statistics("lineno")[:limit], 1):
+            frame = stat.traceback[0]
+            lines.append(f"{index:>3}. {frame.filename}:{frame.lineno}  {_format_bytes(stat.size)} "
+                         f"in {stat.count} blocks")
+    else:
+        lines = [f"Live memory traced since startup: {_format_bytes(current)} (peak {_format_bytes(peak)})", ""]
+        lines.append(f"Top {limit} allocation sites by growth over the last {seconds:g}s:")
+        for index, stat in enumerate(snapshot.compare_to(before, "lineno")[:limit], 1):
+            frame = stat.traceback[0]
+            growth = ("+" if stat.size_diff >= 0 else "") + _format_bytes(stat.size_diff)
+            lines.append(f"{index:>3}. {frame.filename}:{frame.lineno}  {growth} "
+                         f"({_format_bytes(stat.size)} in {stat.count} blocks)")
+    if cache_sizes is not None:
+        lines += ["", "Caches (entries, estimated payload):"]
+        for name, entries, size in cache_sizes():
+            lines.append(f"  {name:<10} {entries:>7}  {_format_bytes(size)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,143 @@
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Timing record of one unit of work (e.g. one Telegram update) and the spans
+    opened while it was current. Spans are kept flat as (name, start offset,
+    duration) in seconds; concurrent spans simply overlap.
+    """
+    __slots__ = ("name", "started_at", "started", "duration", "spans", "attrs")
+
+    def __init__(self, name: str, **attrs):
+        self.name = name
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.attrs = attrs
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, started - self.started, time.perf_counter() - started))
+
+    def finish(self) -> float:
+        self.duration = time.perf_counter() - self.started
+        return self.duration
+
+    def breakdown(self) -> list:
+        """Return [(span name, calls, total seconds)], slowest first."""
+        totals = defaultdict(lambda: [0, 0.0])
+        for name, _, duration in self.spans:
+            totals[name][0] += 1
+            totals[name][1] += duration
+        return sorted(((name, c, t) for name, (c, t) in totals.items()), key=lambda item: -item[2])
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.started_at,
+            "duration_ms": round((self.duration or 0) * 1000, 3),
+            **self.attrs,
+            "spans": [
+                {"name": name, "offset_ms": round(offset * 1000, 3), "duration_ms": round(duration * 1000, 3)}
+                for name, offset, duration in self.spans
+            ],
+        }
+
+
+@contextmanager
+def start_trace(name: str, **attrs):
+    """Make a new Trace current for the enclosed block (and tasks/threads started with its context)."""
+    trace = Trace(name, **attrs)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str):
+    """Record the enclosed block as a span of the current trace; a no-op when nothing is being traced."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    with trace.span(name):
+        yield
+
+
+def traced(name: str):
+    """Decorator recording every call of a function or coroutine function as a span named `name`."""
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                trace = _current_trace.get()
+                if trace is None:
+                    return await func(*args, **kwargs)
+                with trace.span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current_trace.get()
+            if trace is None:
+                return func(*args, **kwargs)
+            with trace.span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def format_breakdown(trace: Trace) -> str:
+    return ", ".join(
+        f"{name} {total * 1000:.1f}ms" + (f" x{calls}" if calls > 1 else "")
+        for name, calls, total in trace.breakdown()
+    )
+
+
+class TraceExporter:
+    """Appends finished traces to a file as JSON lines, for offline analysis."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        line = json.dumps(trace.to_dict(), ensure_ascii=False) + "\n"
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
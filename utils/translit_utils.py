@@ -1,5 +1,9 @@
 from transliterate import translit
 
+from utils.tracing import traced
+
+
+@traced("translit.transliterate_city")
 def transliterate_city(city: str) -> str:
     try:
         return translit(city, 'ru', reversed=True)
@@ -1,15 +1,258 @@
+import asyncio
+import logging
+import os
 import time
+from collections import Counter
+from contextlib import asynccontextmanager
 
-import aiohttp
+from utils.cache import LRUCache, CacheEntry
+from utils.cache_store import SQLiteCacheStore
+from utils.forecast import ParsedForecast
+from utils.http_client import get_http_session, HTTP_ERRORS
+from utils.message_cache import rendered_messages
+from utils.metrics import registry
+from utils.tracing import span, traced
 
-_weather_cache = {}
-_forecast_cache = {}
-_geo_cache = {}
-_air_cache = {}
+logger = logging.getLogger(__name__)
 
-CACHE_TTL = 300
+# Weather and forecast entries are fresh for CACHE_TTL seconds. Until CACHE_HARD_TTL
+# they are still served immediately while a background refresh runs; after that
+# callers wait for upstream. If upstream fails or takes longer than
+# STALE_FALLBACK_TIMEOUT, the last good value is served until CACHE_MAX_STALE.
+CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', 300))
+CACHE_HARD_TTL = int(os.getenv('WEATHER_CACHE_HARD_TTL', 900))
+CACHE_MAX_STALE = int(os.getenv('WEATHER_CACHE_MAX_STALE', 3600))
+STALE_FALLBACK_TIMEOUT = float(os.getenv('WEATHER_STALE_FALLBACK_TIMEOUT', 3))
+# Point at a local stand-in (see benchmarks/fake_servers.py) for load tests.
+OPENWEATHER_API_URL = os.getenv('OPENWEATHER_API_URL', 'https://api.openweathermap.org').rstrip('/')
+GEO_CACHE_TTL = 24 * 60 * 60
+CITY_ID_CACHE_TTL = 7 * 24 * 60 * 60
+GROUP_BATCH_SIZE = 20
+CACHE_MAX_ENTRIES = 2000
+FORECAST_CACHE_MAX_BYTES = 32 * 1024 * 1024
 
+_weather_cache = LRUCache("weather", ttl=CACHE_MAX_STALE, max_entries=CACHE_MAX_ENTRIES)
+_forecast_cache = LRUCache(
+    "forecast", ttl=CACHE_MAX_STALE, max_entries=CACHE_MAX_ENTRIES, max_bytes=FORECAST_CACHE_MAX_BYTES
+)
+_geo_cache = LRUCache("geo", ttl=GEO_CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+_city_id_cache = LRUCache("city_id", ttl=CITY_ID_CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+_air_cache = LRUCache("air", ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
 
+# Optional persistent second tier shared by every process pointing at the same file.
+# L1 misses read through to it and upstream fetches write through to it.
+L2_CACHE_PATH = os.getenv('WEATHER_L2_CACHE_PATH')
+_l2_store = SQLiteCacheStore(L2_CACHE_PATH) if L2_CACHE_PATH else None
+# (encode, decode) for cached values that are not plain JSON.
+_L2_CODECS = {
+    "forecast": (ParsedForecast.to_payload, ParsedForecast.from_payload),
+}
+
+_inflight = {}
+_inflight_stats = {"started": 0, "coalesced": 0}
+_upstream_calls = Counter()
+_background_refreshes = set()
+_stale_stats = {"revalidating": 0, "stale_fallback": 0}
+
+UPSTREAM_SECONDS = registry.histogram(
+    "weather_api_request_seconds", "OpenWeather request latency by endpoint", ["endpoint"]
+)
+UPSTREAM_REQUESTS = registry.counter(
+    "weather_api_requests_total", "OpenWeather requests by endpoint and HTTP status ('error' if none)",
+    ["endpoint", "status"],
+)
+
+
+@asynccontextmanager
+async def _upstream_request(kind: str, url: str):
+    """GET `url` on the shared session, counting and timing it under `kind`."""
+    _upstream_calls[kind] += 1
+    session = await get_http_session()
+    started = time.perf_counter()
+    status = "error"
+    try:
+        with span(f"openweather.{kind}"):
+            async with session.get(url) as resp:
+                status = resp.status
+                yield resp
+    except HTTP_ERRORS:
+        status = "error"
+        raise
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, kind)
+        UPSTREAM_REQUESTS.inc(kind, status)
+
+
+def _city_key(city: str) -> str:
+    return city.strip().lower()
+
+
+def _coord_key(lat: float, lon: float) -> str:
+    return f"{lat},{lon}"
+
+
+async def _get_cached_entry(cache: LRUCache, key: str):
+    entry = cache.get_entry(key)
+    if entry is not None or _l2_store is None:
+        return entry
+    row = await _l2_store.get(cache.name, key)
+    if row is None:
+        return None
+    value, stored_at, expires_at = row
+    codec = _L2_CODECS.get(cache.name)
+    if codec is not None:
+        value = codec[1](value)
+    cache.set(key, value, ttl=expires_at - stored_at, stored_at=stored_at)
+    return CacheEntry(value, stored_at, expires_at, 0)
+
+
+async def _store(cache: LRUCache, key: str, value) -> None:
+    now = time.time()
+    cache.set(key, value, stored_at=now)
+    if _l2_store is not None:
+        codec = _L2_CODECS.get(cache.name)
+        payload = codec[0](value) if codec is not None else value
+        await _l2_store.set(cache.name, key, payload, now, now + cache.ttl)
+
+
+def _flight(key: tuple, fetch) -> asyncio.Future:
+    """Return the in-flight future for `key`, starting `fetch()` if there is none yet."""
+    future = _inflight.get(key)
+    if future is not None:
+        _inflight_stats["coalesced"] += 1
+        return future
+
+    future = asyncio.ensure_future(fetch())
+    _inflight[key] = future
+    _inflight_stats["started"] += 1
+
+    def _release(done):
+        if _inflight.get(key) is done:
+            del _inflight[key]
+
+    future.add_done_callback(_release)
+    return future
+
+
+async def _single_flight(key: tuple, fetch):
+    """
+    Run `fetch()` once for all concurrent callers sharing the same key.
+
+    The first caller starts the upstream request; everyone who arrives before it
+    finishes awaits the same future and gets the same result or exception.
+    """
+    return await asyncio.shield(_flight(key, fetch))
+
+
+def _refresh_in_background(key: tuple, fetch) -> None:
+    if key in _inflight:
+        return
+    task = asyncio.ensure_future(_single_flight(key, fetch))
+    _background_refreshes.add(task)
+
+    def _done(done):
+        _background_refreshes.discard(done)
+        if not done.cancelled() and done.exception() is not None:
+            logger.warning("OpenWeather background refresh failed: %r, key=%s", done.exception(), key)
+
+    task.add_done_callback(_done)
+
+
+async def _get_stale_while_revalidate(cache: LRUCache, kind: str, cache_key: str, fetch):
+    """
+    Serve `cache[cache_key]` according to the soft/hard TTL policy described above,
+    fetching through the single-flight registry when the entry is missing or too old.
+    """
+    key = (kind, cache_key)
+    entry = await _get_cached_entry(cache, cache_key)
+    if entry is not None:
+        age = entry.age
+        if age < CACHE_TTL:
+            return entry.value
+        if age < CACHE_HARD_TTL:
+            _stale_stats["revalidating"] += 1
+            _refresh_in_background(key, fetch)
+            return entry.value
+
+    if entry is None:
+        return await _single_flight(key, fetch)
+
+    try:
+        data = await asyncio.wait_for(_single_flight(key, fetch), STALE_FALLBACK_TIMEOUT)
+    except Exception as e:
+        logger.warning("OpenWeather refresh failed, serving stale data: %r, key=%s", e, key)
+        data = None
+    if data is None:
+        _stale_stats["stale_fallback"] += 1
+        return entry.value
+    return data
+
+
+def close_cache_store() -> None:
+    """Close the persistent cache tier, if one is configured."""
+    if _l2_store is not None:
+        _l2_store.close()
+
+
+def clear_caches() -> None:
+    """Drop every in-memory weather API cache and rendered message (the persistent tier is kept)."""
+    for cache in (_weather_cache, _forecast_cache, _geo_cache, _air_cache, _city_id_cache):
+        cache.clear()
+    rendered_messages.clear()
+
+
+def get_inflight_stats() -> dict:
+    """Return how many upstream calls were started and how many callers were coalesced onto them."""
+    return {**_inflight_stats, **_stale_stats, "in_flight": len(_inflight)}
+
+
+def get_upstream_call_count() -> int:
+    """Total number of HTTP requests sent to OpenWeather so far, across all endpoints."""
+    return sum(_upstream_calls.values())
+
+
+def _collect_metrics():
+    caches = get_cache_stats()
+    for field, metric_type, help in (
+            ("hits", "counter", "Cache lookups that found a live entry"),
+            ("misses", "counter", "Cache lookups that found nothing or an expired entry"),
+            ("evictions", "counter", "Entries evicted by the size limits"),
+            ("size", "gauge", "Entries currently cached"),
+    ):
+        name = f"weather_cache_{field}_total" if metric_type == "counter" else f"weather_cache_{field}"
+        yield name, metric_type, help, [
+            ({"cache": stats["name"]}, stats[field]) for stats in caches if field in stats
+        ]
+    yield "weather_api_coalesced_total", "counter", "Callers served by an already in-flight upstream request", [
+        ({}, _inflight_stats["coalesced"])
+    ]
+    yield "weather_api_stale_served_total", "counter", "Stale cache entries served, by reason", [
+        ({"reason": reason}, count) for reason, count in _stale_stats.items()
+    ]
+
+
+registry.add_collector(_collect_metrics)
+
+
+def get_cache_stats() -> list:
+    """Return hit/miss/eviction/size counters for every weather API cache and the rendered-message cache."""
+    caches = (_weather_cache, _forecast_cache, _geo_cache, _air_cache, _city_id_cache)
+    stats = [cache.stats() for cache in caches]
+    stats.append(rendered_messages.stats())
+    if _l2_store is not None:
+        stats.append({"name": "l2", **_l2_store.stats})
+    return stats
+
+
+def get_cache_sizes() -> list:
+    """Return (cache name, entries, estimated payload bytes) for every in-memory cache."""
+    caches = (_weather_cache, _forecast_cache, _geo_cache, _air_cache, _city_id_cache)
+    sizes = [(cache.name, len(cache), cache.estimated_bytes()) for cache in caches]
+    sizes.append(("messages", len(rendered_messages), rendered_messages.estimated_bytes()))
+    return sizes
+
+
+@traced("weather_api.get_current_weather_full")
 async def get_current_weather_full(city: str, api_key: str):
     """
     Get the full JSON response for current weather conditions for a city from OpenWeather API 2.5.
@@ -21,63 +264,177 @@ async def get_current_weather_full(city: str, api_key: str):
     Returns:
         dict: JSON data with current weather conditions, or None if an error occurred.
     """
-    now = time.time()
-    city_key = city.lower()
-    cache_data = _weather_cache.get(city_key)
-    if cache_data and now - cache_data["timestamp"] < CACHE_TTL:
-        return cache_data["data"]
+    city_key = _city_key(city)
+    return await _get_stale_while_revalidate(
+        _weather_cache,
+        "weather",
+        city_key,
+        lambda: _fetch_current_weather(city, city_key, api_key),
+    )
 
+
+async def _fetch_current_weather(city: str, city_key: str, api_key: str):
     url = (
-        f"https://api.openweathermap.org/data/2.5/weather"
+        f"{OPENWEATHER_API_URL}/data/2.5/weather"
         f"?q={city}&appid={api_key}&units=metric&lang=en"
     )
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
+    try:
+        async with _upstream_request("weather", url) as resp:
             if resp.status != 200:
                 return None
             data = await resp.json()
-            _weather_cache[city_key] = {
-                "timestamp": now,
-                "data": data
-            }
-            return data
+    except HTTP_ERRORS as e:
+        logger.warning("OpenWeather WEATHER request failed: %r, city=%s", e, city)
+        return None
+    await _store(_weather_cache, city_key, data)
+    if data.get("id"):
+        await _store(_city_id_cache, city_key, data["id"])
+    return data
 
 
+@traced("weather_api.get_current_weather_batch")
+async def get_current_weather_batch(cities, api_key: str) -> dict:
+    """
+    Get current weather for many cities with as few upstream calls as possible.
+
+    Fresh cached payloads are reused, and cities already being fetched join that
+    request. Cities whose OpenWeather ID is known are requested through the group
+    endpoint, GROUP_BATCH_SIZE IDs per call; the rest are fetched one by one,
+    which also teaches us their IDs for next time. Group requests go through the
+    in-flight registry too, so handlers asking for one of their cities meanwhile
+    share the group call instead of starting their own.
+
+    Args:
+        cities (iterable): City names as stored in subscriptions.
+        api_key (str): Your OpenWeather API key.
+
+    Returns:
+        dict: city name -> JSON payload (or None if it could not be fetched).
+    """
+    results = {}
+    stale = []
+    for city in set(cities):
+        entry = await _get_cached_entry(_weather_cache, _city_key(city))
+        if entry is not None and entry.age < CACHE_TTL:
+            results[city] = entry.value
+        else:
+            city_id = await _get_cached_entry(_city_id_cache, _city_key(city))
+            stale.append((city, city_id.value if city_id is not None else None))
+
+    # From here until the futures are awaited nothing yields, so the in-flight registry cannot change:
+    # cities already being fetched by a handler or the prefetcher join that request, and every group
+    # request is registered under each of its cities, so single-city callers join the group instead.
+    pending = {}
+    by_id = {}
+    unknown = []
+    for city, city_id in stale:
+        key = ("weather", _city_key(city))
+        if key in _inflight:
+            _inflight_stats["coalesced"] += 1
+            pending[city] = _inflight[key]
+        elif city_id is not None:
+            by_id.setdefault(city_id, []).append(city)
+        else:
+            unknown.append(city)
+
+    ids = list(by_id)
+    for start in range(0, len(ids), GROUP_BATCH_SIZE):
+        chunk = ids[start:start + GROUP_BATCH_SIZE]
+        group = asyncio.ensure_future(_fetch_weather_group(chunk, api_key))
+        for city_id in chunk:
+            for city in by_id[city_id]:
+                pending[city] = _flight(
+                    ("weather", _city_key(city)),
+                    lambda city=city, city_id=city_id: _weather_from_group(group, city_id, city, api_key),
+                )
+    for city in unknown:
+        pending[city] = asyncio.ensure_future(get_current_weather_full(city, api_key))
+
+    fetched = await asyncio.gather(*(asyncio.shield(future) for future in pending.values()))
+    results.update(zip(pending, fetched))
+    return results
+
+
+async def _weather_from_group(group: asyncio.Future, city_id: int, city: str, api_key: str):
+    """One city's share of a group request, fetched on its own if the group call did not return it."""
+    payloads = await asyncio.shield(group)
+    data = payloads.get(city_id) if payloads is not None else None
+    if data is None:
+        return await _fetch_current_weather(city, _city_key(city), api_key)
+    await _store(_weather_cache, _city_key(city), data)
+    return data
+
+
+async def _fetch_weather_group(city_ids: list, api_key: str):
+    """Fetch current weather for up to GROUP_BATCH_SIZE city IDs. Returns {id: payload} or None on error."""
+    url = (
+        f"{OPENWEATHER_API_URL}/data/2.5/group"
+        f"?id={','.join(str(i) for i in city_ids)}&appid={api_key}&units=metric&lang=en"
+    )
+    try:
+        async with _upstream_request("group", url) as resp:
+            if resp.status != 200:
+                logger.warning("OpenWeather GROUP error: status=%s, ids=%s", resp.status, city_ids)
+                return None
+            data = await resp.json()
+    except HTTP_ERRORS as e:
+        logger.warning("OpenWeather GROUP request failed: %r, ids=%s", e, city_ids)
+        return None
+
+    payloads = {}
+    for item in data.get("list", []):
+        # Group items carry the UTC offset in "sys" instead of at the top level.
+        if "timezone" not in item and "timezone" in item.get("sys", {}):
+            item["timezone"] = item["sys"]["timezone"]
+        payloads[item.get("id")] = item
+    return payloads
+
+
+@traced("weather_api.get_forecast_json")
 async def get_forecast_json(city: str, api_key: str):
     """
-    Get the full JSON response for a 5-day / 3-hour weather forecast for a city from OpenWeather API 2.5.
-    Returns dict or None if error.
+    Get the 5-day / 3-hour weather forecast for a city from OpenWeather API 2.5,
+    parsed once into a compact ParsedForecast.
+    Returns ParsedForecast or None if error.
     """
-    now = time.time()
-    city_key = city.lower()
-    cache_data = _forecast_cache.get(city_key)
-    if cache_data and now - cache_data["timestamp"] < CACHE_TTL:
-        return cache_data["data"]
+    city_key = _city_key(city)
+    return await _get_stale_while_revalidate(
+        _forecast_cache,
+        "forecast",
+        city_key,
+        lambda: _fetch_forecast(city, city_key, api_key),
+    )
+
 
+async def _fetch_forecast(city: str, city_key: str, api_key: str):
     url = (
-        f"https://api.openweathermap.org/data/2.5/forecast"
+        f"{OPENWEATHER_API_URL}/data/2.5/forecast"
         f"?q={city}&appid={api_key}&units=metric&lang=en"
     )
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
+    try:
+        async with _upstream_request("forecast", url) as resp:
             text = await resp.text()
             if resp.status != 200:
-                print(f"OpenWeather FORECAST error: status={resp.status}, text={text}")
+                logger.warning("OpenWeather FORECAST error: status=%s, text=%s", resp.status, text)
                 return None
             data = await resp.json()
-            if data.get("cod") != "200":
-                print(f"OpenWeather FORECAST error: cod={data.get('cod')}, message={data.get('message')}, city={city}")
-                return None
-            if "list" not in data:
-                print(f"OpenWeather FORECAST: no 'list' in response, city={city}, data={data}")
-                return None
-            _forecast_cache[city_key] = {
-                "timestamp": now,
-                "data": data
-            }
-            return data
+    except HTTP_ERRORS as e:
+        logger.warning("OpenWeather FORECAST request failed: %r, city=%s", e, city)
+        return None
+    if data.get("cod") != "200":
+        logger.warning(
+            "OpenWeather FORECAST error: cod=%s, message=%s, city=%s", data.get('cod'), data.get('message'), city
+        )
+        return None
+    if "list" not in data:
+        logger.warning("OpenWeather FORECAST: no 'list' in response, city=%s, data=%s", city, data)
+        return None
+    forecast = ParsedForecast.from_json(data["list"])
+    await _store(_forecast_cache, city_key, forecast)
+    return forecast
 
 
+@traced("weather_api.get_city_coordinates")
 async def get_city_coordinates(city: str, api_key: str):
     """
        Get the latitude and longitude of a city using the OpenWeather Geocoding API.
@@ -89,19 +446,36 @@ async def get_city_coordinates(city: str, api_key: str):
        Returns:
            tuple: (lat, lon) as floats if found, otherwise (None, None).
        """
-    url = f"http://api.openweathermap.org/geo/1.0/direct?q={city}&limit=1&appid={api_key}"
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
+    city_key = _city_key(city)
+    cached = await _get_cached_entry(_geo_cache, city_key)
+    if cached is not None:
+        return tuple(cached.value)
+
+    return await _single_flight(
+        ("geo", city_key),
+        lambda: _fetch_city_coordinates(city, city_key, api_key),
+    )
+
+
+async def _fetch_city_coordinates(city: str, city_key: str, api_key: str):
+    url = f"{OPENWEATHER_API_URL}/geo/1.0/direct?q={city}&limit=1&appid={api_key}"
+    try:
+        async with _upstream_request("geo", url) as resp:
             if resp.status != 200:
                 return None, None
             data = await resp.json()
-            if data:
-                lat = data[0]['lat']
-                lon = data[0]['lon']
-                return lat, lon
-            return None, None
+    except HTTP_ERRORS as e:
+        logger.warning("OpenWeather GEO request failed: %r, city=%s", e, city)
+        return None, None
+    if data:
+        lat = data[0]['lat']
+        lon = data[0]['lon']
+        await _store(_geo_cache, city_key, (lat, lon))
+        return lat, lon
+    return None, None
 
 
+@traced("weather_api.get_air_quality")
 async def get_air_quality(lat: float, lon: float, api_key: str):
     """
         Get air quality data for a specific location using the OpenWeather Air Pollution API.
@@ -114,23 +488,114 @@ async def get_air_quality(lat: float, lon: float, api_key: str):
         Returns:
             dict: Air quality data from the API response, or None if an error occurred.
         """
-    now = time.time()
-    coord_key = f"{lat},{lon}"
-    cache_data = _air_cache.get(coord_key)
-    if cache_data and now - cache_data["timestamp"] < CACHE_TTL:
-        return cache_data["data"]
+    coord_key = _coord_key(lat, lon)
+    cached = await _get_cached_entry(_air_cache, coord_key)
+    if cached is not None:
+        return cached.value
 
+    return await _single_flight(
+        ("air", coord_key),
+        lambda: _fetch_air_quality(lat, lon, coord_key, api_key),
+    )
+
+
+async def _fetch_air_quality(lat: float, lon: float, coord_key: str, api_key: str):
     url = (
-        f"https://api.openweathermap.org/data/2.5/air_pollution"
+        f"{OPENWEATHER_API_URL}/data/2.5/air_pollution"
         f"?lat={lat}&lon={lon}&appid={api_key}"
     )
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url) as resp:
+    try:
+        async with _upstream_request("air", url) as resp:
             if resp.status != 200:
                 return None
             data = await resp.json()
-            _air_cache[coord_key] = {
-                "timestamp": now,
-                "data": data
-            }
-            return data
+    except HTTP_ERRORS as e:
+        logger.warning("OpenWeather AIR request failed: %r, lat=%s, lon=%s", e, lat, lon)
+        return None
+    await _store(_air_cache, coord_key, data)
+    return data
+
+
+# Sections of a LocationSnapshot, named after the attribute holding each payload.
+SECTIONS = ("current", "forecast", "air")
+
+
+class LocationSnapshot:
+    """
+    What the bot shows for one location: current weather, the 5-day forecast
+    and air quality. Only the requested sections are filled in. Each one comes
+    from its own cache with its own freshness, and `versions` maps each present
+    section to the time its payload was fetched. Sections that were not
+    requested, or whose endpoint failed, are None.
+    """
+    __slots__ = ("city", "current", "forecast", "air", "versions")
+
+    def __init__(self, city: str):
+        self.city = city
+        self.current = None
+        self.forecast = None
+        self.air = None
+        self.versions = {}
+
+    def version(self, section: str) -> float:
+        """Fetch time of `section`'s payload, used to version messages rendered from it."""
+        return self.versions.get(section, 0.0)
+
+
+def _fetched_at(cache: LRUCache, key: str, value) -> float:
+    entry = cache.peek(key)
+    return entry.stored_at if entry is not None and entry.value is value else time.time()
+
+
+async def _load_current(snapshot: LocationSnapshot, city_key: str, api_key: str, with_air: bool) -> None:
+    current = await get_current_weather_full(snapshot.city, api_key)
+    if not current:
+        return
+    snapshot.current = current
+    snapshot.versions["current"] = _fetched_at(_weather_cache, city_key, current)
+    if not with_air or "coord" not in current:
+        return
+    # The current-weather payload carries the coordinates, so air quality needs no geocoding call.
+    lat, lon = current["coord"]["lat"], current["coord"]["lon"]
+    air = await get_air_quality(lat, lon, api_key)
+    if air is not None:
+        snapshot.air = air
+        snapshot.versions["air"] = _fetched_at(_air_cache, _coord_key(lat, lon), air)
+
+
+async def _load_forecast(snapshot: LocationSnapshot, city_key: str, api_key: str) -> None:
+    forecast = await get_forecast_json(snapshot.city, api_key)
+    if forecast is not None:
+        snapshot.forecast = forecast
+        snapshot.versions["forecast"] = _fetched_at(_forecast_cache, city_key, forecast)
+
+
+@traced("weather_api.get_location_snapshot")
+async def get_location_snapshot(city: str, api_key: str, sections=SECTIONS):
+    """
+    Get the requested sections of a city's weather data, fetched in parallel.
+
+    Each section is served from its own cache under the soft/hard TTL policy,
+    so asking for current weather never costs a forecast or air-quality call,
+    and a failed section is retried on its own next time. Air quality also
+    loads current weather, whose payload carries the coordinates.
+
+    Args:
+        city (str): Name of the city (in English or transliterated).
+        api_key (str): Your OpenWeather API key.
+        sections (iterable): Any of "current", "forecast" and "air".
+
+    Returns:
+        LocationSnapshot: or None if nothing could be fetched for the city.
+    """
+    city_key = _city_key(city)
+    snapshot = LocationSnapshot(city)
+    loads = []
+    if "current" in sections or "air" in sections:
+        loads.append(_load_current(snapshot, city_key, api_key, with_air="air" in sections))
+    if "forecast" in sections:
+        loads.append(_load_forecast(snapshot, city_key, api_key))
+    await asyncio.gather(*loads)
+    if not snapshot.versions:
+        return None
+    return snapshot